@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+
+# Renders the row of module widgets with and without the glyph atlas
+#
+#   python3 -m benchmarks.atlas --iterations 200
+
+from PIL import Image, ImageChops
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from widgets import *
+from dashboard import buildScreen
+from benchmarks.recorded import RecordedWeatherStationData
+
+def moduleRow(fixture: dict):
+    weatherData = RecordedWeatherStationData(fixture)
+    fetcher = MeasureFetcher(weatherData)
+    screen = buildScreen(weatherData, fetcher)
+    screen.collectMeasures(fetcher)
+    fetcher.fetch()
+    screen.render()
+    # the second row of the dashboard layout, sized by the render above
+    return screen.view.view[1]
+
+def renderRow(row, render_mode: str) -> Image:
+    # The render cache would skip the text, so every pass draws it again
+    RenderCache().clear()
+    if render_mode == 'L':
+        canvas = Image.new('L', (row.width, row.height), 255)
+        return row.renderInto(canvas, 0, 0)
+    return row.render().convert('L')
+
+def measure(row, render_mode: str, iterations: int, atlas: bool) -> tuple:
+    ConfigHelper.glyph_atlas = atlas
+    image = renderRow(row, render_mode)
+    times = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        renderRow(row, render_mode)
+        times.append(time.perf_counter() - start)
+    return image, statistics.median(times) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Compare the module row rendered with and without the glyph atlas.')
+    parser.add_argument('--fixture', default = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'fixtures', 'sample.json'))
+    parser.add_argument('--iterations', type = int, default = 200)
+    args = parser.parse_args()
+
+    with open(args.fixture) as file:
+        fixture = json.load(file)
+    row = moduleRow(fixture)
+    configured = ConfigHelper.glyph_atlas
+    try:
+        print('%-12s %14s %14s %8s %10s' % ('render mode', 'FreeType ms', 'atlas ms', 'speedup', 'identical'))
+        for render_mode in ('RGBA', 'L'):
+            freetype, freetype_ms = measure(row, render_mode, args.iterations, False)
+            atlas, atlas_ms = measure(row, render_mode, args.iterations, True)
+            identical = ImageChops.difference(freetype, atlas).getbbox() == None
+            print('%-12s %14.3f %14.3f %7.2fx %10s' % (render_mode, freetype_ms, atlas_ms, freetype_ms / atlas_ms, identical))
+    finally:
+        ConfigHelper.glyph_atlas = configured
+    print('glyph hits %s, misses %s' % (GlyphAtlas().hits, GlyphAtlas().misses))
+
+if __name__ == '__main__':
+    main()
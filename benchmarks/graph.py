@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+
+# Renders the graph wider than the dashboard does, with one slot per pixel
+#
+#   python3 -m benchmarks.graph --iterations 20
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from widgets import *
+from benchmarks.recorded import RecordedWeatherStationData, repeatMeasures
+
+def graphWidget(weatherData: RecordedWeatherStationData, now: float, width: int, height: int, density: int, vectorized: bool) -> GraphWidget:
+    registry = StationRegistry().update(weatherData)
+    rain_modules = registry.modules('rain')
+    graph = GraphWidget(registry.modules('outdoor')[0], registry.station(), weatherData, density = density, rain_module = rain_modules[0] if rain_modules else None, vectorized = vectorized, now = now)
+    return graph.setSize(width, height)
+
+def measure(graph: GraphWidget, iterations: int) -> float:
+    graph.render()
+    times = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        graph.render()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Time the graph at large widths.')
+    parser.add_argument('--fixture', default = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'fixtures', 'sample.json'))
+    parser.add_argument('--iterations', type = int, default = 20)
+    parser.add_argument('--widths', type = int, nargs = '+', default = [1000, 2000, 4000])
+    parser.add_argument('--height', type = int, default = 200)
+    parser.add_argument('--density', type = int, default = 1)
+    args = parser.parse_args()
+
+    with open(args.fixture) as file:
+        fixture = json.load(file)
+    now = fixture['recorded_at']
+    # a slot is half an hour, the recording is repeated so the widest graph is filled
+    fixture = repeatMeasures(fixture, max(args.widths) / args.density / 48 + 2)
+    weatherData = RecordedWeatherStationData(fixture, now)
+    paths = (True, False) if numpy is not None else (False,)
+    print('%-8s %8s %14s %14s %19s %15s' % ('width', 'slots', 'vectorized ms', 'scalar ms', 'vectorized us/slot', 'scalar us/slot'))
+    for width in args.widths:
+        times = {vectorized: measure(graphWidget(weatherData, now, width, args.height, args.density, vectorized), args.iterations) for vectorized in paths}
+        slots = int(graphWidget(weatherData, now, width, args.height, args.density, False).calculateGraphArea()[1] // args.density)
+        vectorized = ('%.3f' % times[True], '%.2f' % (times[True] / slots * 1000)) if True in times else ('-', '-')
+        # the time per slot stays about the same if the graph scales linearly with its width
+        print('%-8d %8d %14s %14.3f %19s %15.2f' % (width, slots, vectorized[0], times[False], vectorized[1], times[False] / slots * 1000))
+
+if __name__ == '__main__':
+    main()
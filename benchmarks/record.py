@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+
+# Records the station payload and all measures one dashboard refresh needs into a fixture,
+# or with --every a log of them to replay with main.py --replay
+#
+#   python3 -m benchmarks.record benchmarks/fixtures/my_station.json
+#   python3 -m benchmarks.record --every 600 --count 144 benchmarks/fixtures/my_station.jsonl
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import lnetatmo
+from widgets import MeasureFetcher, NetatmoTransport, CachedClientAuth
+from dashboard import buildScreen
+from benchmarks.recorded import RecordingWeatherStationData
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Record a fixture for the benchmarks from the Netatmo API.')
+    parser.add_argument('output')
+    parser.add_argument('--every', type = float, help = 'append a fixture to the output every so many seconds')
+    parser.add_argument('--count', type = int, default = 1, help = 'number of fixtures to append')
+    args = parser.parse_args()
+
+    NetatmoTransport().install()
+    authorization = CachedClientAuth()
+    for i in range(args.count if args.every else 1):
+        if i > 0:
+            time.sleep(args.every)
+        weatherData = RecordingWeatherStationData(lnetatmo.WeatherStationData(authorization))
+        fetcher = MeasureFetcher(weatherData)
+        screen = buildScreen(weatherData, fetcher)
+        screen.collectMeasures(fetcher)
+        fetcher.fetch()
+        if args.every:
+            weatherData.append(args.output)
+        else:
+            weatherData.save(args.output)
+        print('Recorded %s measures to %s' % (len(weatherData.measures), args.output))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+from datetime import datetime, timezone
+import copy
+import json
+import math
+
+# Fields of the station payload holding a point in time, moved along when replaying
+TIME_FIELDS = ('last_status_store', 'last_seen', 'last_message', 'last_setup', 'time_utc', 'date_min_temp', 'date_max_temp', 'date_max_wind_str')
+
+class RecordingWeatherStationData(object):
+    # Wraps a lnetatmo.WeatherStationData and keeps every getMeasure response for a fixture
+    def __init__(self, netatmo_client):
+        self.netatmo_client = netatmo_client
+        self.measures = []
+
+    def __getattr__(self, name):
+        return getattr(self.netatmo_client, name)
+
+    def getMeasure(self, device_id, scale, mtype, module_id = None, date_begin = None, date_end = None, limit = None, optimize = False, real_time = False):
+        response = self.netatmo_client.getMeasure(device_id, scale, mtype, module_id, date_begin, date_end, limit, optimize, real_time)
+        request = dict(device_id = device_id, scale = scale, mtype = mtype, module_id = module_id, date_begin = date_begin, date_end = date_end, limit = limit, optimize = optimize, real_time = real_time)
+        self.measures.append({'request': request, 'response': response})
+        return response
+
+    def fixture(self) -> dict:
+        return {
+            'recorded_at': datetime.now(timezone.utc).timestamp(),
+            'default_station': self.netatmo_client.default_station,
+            'devices': self.netatmo_client.rawData,
+            'measures': self.measures,
+        }
+
+    def save(self, path: str):
+        with open(path, 'w') as file:
+            json.dump(self.fixture(), file)
+
+    def append(self, path: str):
+        # one fixture per line, a log for main.py --replay
+        with open(path, 'a') as file:
+            file.write(json.dumps(self.fixture()) + '\n')
+
+class RecordedWeatherStationData(object):
+    # Answers like lnetatmo.WeatherStationData from a recorded fixture, shifted to the current time
+    def __init__(self, fixture: dict, now: float = None):
+        now = now if now != None else datetime.now(timezone.utc).timestamp()
+        self.shift = int(now - fixture['recorded_at'])
+        self.rawData = self.shiftTimes(copy.deepcopy(fixture['devices']))
+        self.stations = { d['station_name'] : d for d in self.rawData }
+        self.stationIds = { d['_id'] : d for d in self.rawData }
+        self.default_station = fixture['default_station']
+        self.modules = {}
+        for m in self.stations[self.default_station].get('modules', []):
+            self.modules[m['_id']] = m
+        self.measures = {}
+        for measure in fixture['measures']:
+            request = measure['request']
+            self.measures[self.seriesKey(request['device_id'], request['scale'], request['mtype'], request['module_id'], request['optimize'])] = measure['response']
+        self.calls = 0
+
+    @staticmethod
+    def load(path: str, now: float = None):
+        with open(path) as file:
+            return RecordedWeatherStationData(json.load(file), now)
+
+    def shiftTimes(self, data):
+        if isinstance(data, list):
+            return [self.shiftTimes(d) for d in data]
+        if isinstance(data, dict):
+            return {k: (v + self.shift if k in TIME_FIELDS and isinstance(v, (int, float)) else self.shiftTimes(v)) for k, v in data.items()}
+        return data
+
+    def seriesKey(self, device_id, scale, mtype, module_id, optimize) -> tuple:
+        return (device_id, module_id, scale, mtype, bool(optimize))
+
+    def getMeasure(self, device_id, scale, mtype, module_id = None, date_begin = None, date_end = None, limit = None, optimize = False, real_time = False):
+        self.calls += 1
+        response = self.measures.get(self.seriesKey(device_id, scale, mtype, module_id, optimize))
+        if response == None or 'body' not in response:
+            return response
+        begin = date_begin if date_begin != None else float('-inf')
+        end = date_end if date_end != None else float('inf')
+        body = []
+        if optimize:
+            for chunk in response['body']:
+                step = chunk.get('step_time', 0)
+                values = []
+                beg_time = None
+                for i, value in enumerate(chunk['value']):
+                    time = chunk['beg_time'] + self.shift + i * step
+                    if begin <= time <= end:
+                        if beg_time == None:
+                            beg_time = time
+                        values.append(value)
+                if values:
+                    body.append({'beg_time': beg_time, 'step_time': step, 'value': values})
+        else:
+            body = {str(int(t) + self.shift): v for t, v in response['body'].items() if begin <= int(t) + self.shift <= end}
+        return {'body': body, 'status': response.get('status', 'ok')}
+
+def repeatMeasures(fixture: dict, days: float) -> dict:
+    # A copy of the fixture whose optimized measures are repeated back in time until they cover
+    # the days before the recording, for graphs wider than what was recorded
+    fixture = copy.deepcopy(fixture)
+    begin = fixture['recorded_at'] - days * 86400
+    for measure in fixture['measures']:
+        body = measure['response'].get('body') if measure['response'] else None
+        if not measure['request']['optimize'] or not body:
+            continue
+        step = max(chunk.get('step_time', 0) for chunk in body)
+        first = body[0]['beg_time']
+        period = body[-1]['beg_time'] + (len(body[-1]['value']) - 1) * step + step - first
+        copies = max(0, math.ceil((first - begin) / period))
+        repeated = []
+        for i in range(copies, 0, -1):
+            repeated.extend(dict(chunk, beg_time = chunk['beg_time'] - i * period) for chunk in body)
+        measure['response']['body'] = repeated + body
+    return fixture
@@ -0,0 +1,100 @@
+from benchmarks.recorded import RecordedWeatherStationData
+from widgets import StationProbe
+import bisect
+import json
+import statistics
+import time
+
+class VirtualClock(object):
+    # Stands in for time.time and time.sleep, sleeping only moves the clock forward
+    def __init__(self, start: float):
+        self.now = start
+        self.slept = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += max(0, seconds)
+        self.slept += max(0, seconds)
+
+class ReplayProbe(StationProbe):
+    def __init__(self, replay):
+        super().__init__(None)
+        self.replay = replay
+
+    def lastStatusStore(self) -> int:
+        return self.replay.lastStatusStore()
+
+class Replay(object):
+    # Answers main.py from recorded fixtures on a virtual clock. A log holds fixtures recorded one
+    # after the other, each one is replayed from its own time on. Past its time a fixture moves along
+    # in whole upload periods, like the station would upload, so a single one can be replayed for days.
+    def __init__(self, fixtures: list, duration: float = None, upload_period: float = 600):
+        self.fixtures = sorted(fixtures, key = lambda fixture: fixture['recorded_at'])
+        self.recorded_at = [fixture['recorded_at'] for fixture in self.fixtures]
+        self.upload_period = upload_period
+        self.start = self.recorded_at[0]
+        self.end = self.start + duration if duration else self.recorded_at[-1] + upload_period
+        self.clock = VirtualClock(self.start)
+        self.polls = 0
+        self.renders = []
+        self.started = time.perf_counter()
+
+    @staticmethod
+    def load(path: str, duration: float = None):
+        # a fixture as written by benchmarks.record, or a log of them with one per line
+        with open(path) as file:
+            text = file.read()
+        if text.lstrip().startswith('['):
+            fixtures = json.loads(text)
+        elif '\n' in text.strip():
+            fixtures = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            fixtures = [json.loads(text)]
+        return Replay(fixtures, duration)
+
+    def isRunning(self) -> bool:
+        return self.clock.time() < self.end
+
+    def fixtureAt(self, now: float) -> tuple:
+        fixture = self.fixtures[max(0, bisect.bisect_right(self.recorded_at, now) - 1)]
+        shift = max(0, (now - fixture['recorded_at']) // self.upload_period * self.upload_period)
+        return fixture, fixture['recorded_at'] + shift
+
+    def weatherData(self) -> RecordedWeatherStationData:
+        self.polls += 1
+        fixture, now = self.fixtureAt(self.clock.time())
+        return RecordedWeatherStationData(fixture, now)
+
+    def lastStatusStore(self) -> int:
+        # what the probe of the station would ask for
+        self.polls += 1
+        fixture, now = self.fixtureAt(self.clock.time())
+        for device in fixture['devices']:
+            if device['station_name'] == fixture['default_station']:
+                return device['last_status_store'] + int(now - fixture['recorded_at'])
+
+    def probe(self) -> ReplayProbe:
+        return ReplayProbe(self)
+
+    def recordRender(self, seconds: float):
+        self.renders.append(seconds)
+
+    def report(self, displays: dict) -> dict:
+        updates = {}
+        for display in displays.values():
+            for kind, region in display.driver.updates:
+                updates[kind] = updates.get(kind, 0) + 1
+        renders = sorted(self.renders)
+        return {
+            'virtual_days': (self.clock.time() - self.start) / 86400,
+            'wall_s': time.perf_counter() - self.started,
+            'polls': self.polls,
+            'refreshes': len(renders),
+            'render_mean_ms': statistics.mean(renders) * 1000 if renders else None,
+            'render_median_ms': statistics.median(renders) * 1000 if renders else None,
+            'render_p95_ms': renders[int(len(renders) * 0.95)] * 1000 if renders else None,
+            'render_max_ms': renders[-1] * 1000 if renders else None,
+            'display_updates': updates,
+        }
@@ -0,0 +1,258 @@
+#!/usr/bin/python3
+
+# Replays a recorded fixture through the dashboard layout and times every phase of a refresh
+#
+#   python3 -m benchmarks.run --iterations 20
+#   python3 -m benchmarks.run --compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+
+from io import BytesIO
+import argparse
+import json
+import locale
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from widgets import *
+from widgets.View import View
+from widgets.FontCache import FontCache
+from dashboard import buildScreen
+from benchmarks.recorded import RecordedWeatherStationData
+import PIL
+
+PHASES = ('build', 'fetch', 'layout', 'text fitting', 'rasterization', '1-bit conversion', 'export')
+# Methods timed inside the render tree, with the phase their own time counts for
+TIMED_METHODS = {'prepareChild': 'layout', 'calculateTextSize': 'text fitting', 'render': 'rasterization', 'renderInto': 'rasterization'}
+
+class PhaseTimer(object):
+    # Wraps the view methods and attributes their exclusive time to phases and widget classes
+    def __init__(self):
+        self.stack = []
+        self.phases = {}
+        self.widgets = {}
+        self.originals = []
+
+    def wrap(self, cls, name: str, phase: str):
+        original = cls.__dict__[name]
+        timer = self
+
+        def timed(view, *args, **kwargs):
+            # a super() call of the same view is not counted as another call
+            call = 0 if timer.stack and timer.stack[-1][1] is view else 1
+            timer.stack.append([0.0, view])
+            start = time.perf_counter()
+            try:
+                return original(view, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                nested = timer.stack.pop()[0]
+                if timer.stack:
+                    timer.stack[-1][0] += elapsed
+                own = elapsed - nested
+                timer.phases[phase] = timer.phases.get(phase, 0.0) + own
+                if phase == 'rasterization':
+                    calls, total = timer.widgets.get(type(view).__name__, (0, 0.0))
+                    timer.widgets[type(view).__name__] = (calls + call, total + own)
+
+        setattr(cls, name, timed)
+        self.originals.append((cls, name, original))
+
+    def install(self):
+        classes = [View]
+        for cls in classes:
+            classes.extend(cls.__subclasses__())
+        for cls in classes:
+            for name, phase in TIMED_METHODS.items():
+                if name in cls.__dict__:
+                    self.wrap(cls, name, phase)
+        return self
+
+    def uninstall(self):
+        for cls, name, original in reversed(self.originals):
+            setattr(cls, name, original)
+        self.originals = []
+
+    def reset(self):
+        self.phases = {}
+        self.widgets = {}
+
+def refresh(fixture: dict, timer: PhaseTimer, render_mode: str) -> dict:
+    # One pass of the main loop, measured phase by phase
+    durations = {}
+    timer.reset()
+
+    start = time.perf_counter()
+    weatherData = RecordedWeatherStationData(fixture)
+    fetcher = MeasureFetcher(weatherData)
+    screen = buildScreen(weatherData, fetcher)
+    if render_mode:
+        screen.setRenderMode(render_mode)
+    durations['build'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    screen.collectMeasures(fetcher)
+    fetcher.fetch()
+    # the layout done while collecting is reported as layout
+    durations['fetch'] = time.perf_counter() - start - timer.phases.get('layout', 0.0)
+
+    image = screen.render()
+    durations['layout'] = timer.phases.get('layout', 0.0)
+    durations['text fitting'] = timer.phases.get('text fitting', 0.0)
+    durations['rasterization'] = timer.phases.get('rasterization', 0.0)
+
+    start = time.perf_counter()
+    image.convert('1')
+    durations['1-bit conversion'] = time.perf_counter() - start
+
+    # encoded like the exported files, without writing them
+    exporter = ImageExporter()
+    start = time.perf_counter()
+    for format in exporter.formats:
+        exporter.write(image, format, BytesIO())
+    durations['export'] = time.perf_counter() - start
+    return durations
+
+def summarize(values: list) -> dict:
+    return {
+        'mean_ms': statistics.mean(values) * 1000,
+        'median_ms': statistics.median(values) * 1000,
+        'min_ms': min(values) * 1000,
+        'max_ms': max(values) * 1000,
+        'stdev_ms': (statistics.stdev(values) if len(values) > 1 else 0.0) * 1000,
+    }
+
+def clearCaches():
+    RenderCache().clear()
+    TextMetrics().clear()
+    FontCache().clear()
+    LayoutPlan().clear()
+    GlyphAtlas().clear()
+    WindRoseCache().clear()
+
+def commitId() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output = True, text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def run(fixture_path: str, iterations: int, warmup: int, cold: bool, render_mode: str, memory_iterations: int) -> dict:
+    with open(fixture_path) as file:
+        fixture = json.load(file)
+
+    timer = PhaseTimer().install()
+    try:
+        for i in range(warmup):
+            refresh(fixture, timer, render_mode)
+        phases = {phase: [] for phase in PHASES}
+        totals = []
+        widgets = {}
+        for i in range(iterations):
+            if cold:
+                clearCaches()
+            durations = refresh(fixture, timer, render_mode)
+            for phase in PHASES:
+                phases[phase].append(durations[phase])
+            totals.append(sum(durations.values()))
+            for name, (calls, total) in timer.widgets.items():
+                widget = widgets.setdefault(name, {'calls': 0, 'total': 0.0})
+                widget['calls'] += calls
+                widget['total'] += total
+    finally:
+        timer.uninstall()
+
+    # traced separately, tracemalloc slows down the timed runs
+    peaks = []
+    for i in range(memory_iterations):
+        if cold:
+            clearCaches()
+        tracemalloc.start()
+        refresh(fixture, PhaseTimer(), render_mode)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        'commit': commitId(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pillow': PIL.__version__,
+        'machine': platform.machine(),
+        'fixture': os.path.basename(fixture_path),
+        'iterations': iterations,
+        'cold': cold,
+        'render_mode': render_mode if render_mode else ConfigHelper().render_mode,
+        'total': summarize(totals),
+        'phases': {phase: summarize(values) for phase, values in phases.items()},
+        'widgets': {name: {'calls_per_refresh': w['calls'] / iterations, 'mean_ms': w['total'] / iterations * 1000} for name, w in sorted(widgets.items())},
+        'memory': {
+            'python_peak_kb': max(peaks) / 1024 if peaks else None,
+            'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+    }
+
+def printResult(result: dict):
+    print('%s on %s, %s iterations%s, render mode %s' % (result['fixture'], result['commit'], result['iterations'], ' (cold caches)' if result['cold'] else '', result['render_mode']))
+    print('%-18s %10s %10s %10s' % ('phase', 'median ms', 'mean ms', 'max ms'))
+    for phase, values in list(result['phases'].items()) + [('total', result['total'])]:
+        print('%-18s %10.2f %10.2f %10.2f' % (phase, values['median_ms'], values['mean_ms'], values['max_ms']))
+    print()
+    print('%-18s %10s %10s' % ('widget', 'calls', 'mean ms'))
+    for name, values in result['widgets'].items():
+        print('%-18s %10.1f %10.2f' % (name, values['calls_per_refresh'], values['mean_ms']))
+    print()
+    print('Python heap peak %.0f KB, max RSS %s KB' % (result['memory']['python_peak_kb'] or 0, result['memory']['max_rss_kb']))
+
+def compare(old_path: str, new_path: str):
+    with open(old_path) as file:
+        old = json.load(file)
+    with open(new_path) as file:
+        new = json.load(file)
+    print('%s -> %s (median ms)' % (old['commit'], new['commit']))
+    rows = [(phase, old['phases'].get(phase), new['phases'].get(phase)) for phase in PHASES] + [('total', old['total'], new['total'])]
+    for phase, before, after in rows:
+        if not before or not after:
+            continue
+        change = (after['median_ms'] - before['median_ms']) / before['median_ms'] * 100 if before['median_ms'] else 0.0
+        print('%-18s %10.2f %10.2f %+8.1f%%' % (phase, before['median_ms'], after['median_ms'], change))
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark a dashboard refresh against a recorded fixture.')
+    parser.add_argument('--fixture', default = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'fixtures', 'sample.json'))
+    parser.add_argument('--iterations', type = int, default = 20)
+    parser.add_argument('--warmup', type = int, default = 1)
+    parser.add_argument('--cold', action = 'store_true', help = 'clear the font, text metric, glyph, layout and render caches before every refresh')
+    parser.add_argument('--render-mode', choices = ['RGBA', 'L'], default = None)
+    parser.add_argument('--memory-iterations', type = int, default = 3)
+    parser.add_argument('--output', help = 'result file, defaults to benchmarks/results/<commit>.json')
+    parser.add_argument('--compare', nargs = 2, metavar = ('OLD', 'NEW'), help = 'compare two result files instead of running')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    try:
+        locale.setlocale(locale.LC_ALL, 'de_DE.UTF-8')
+    except locale.Error:
+        pass
+
+    result = run(args.fixture, args.iterations, args.warmup, args.cold, args.render_mode, args.memory_iterations)
+    printResult(result)
+
+    output = args.output
+    if not output:
+        results = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'results')
+        os.makedirs(results, exist_ok = True)
+        output = os.path.join(results, result['commit'] + '.json')
+    with open(output, 'w') as file:
+        json.dump(result, file, indent = 2)
+    print('Saved to ' + output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+import logging
+from widgets import *
+
+def classifyModules(weatherData) -> tuple:
+    # The modules of the default station by kind, from the index kept between refreshes
+    registry = StationRegistry().update(weatherData)
+    return registry.modules('outdoor'), registry.modules('rain'), registry.modules('wind'), registry.modules('indoor')
+
+def buildScreen(weatherData, fetcher: MeasureFetcher, width: int = None, height: int = None, now: float = None) -> Screen:
+    # The dashboard layout, shared by main.py and the benchmarks
+    config = ConfigHelper()
+    # screens built again from the same data, e.g. in other processes, show the same time
+    now = now if now != None else datetime.now(timezone.utc).timestamp()
+    main_module = [weatherData.stations[weatherData.default_station]]
+    outdoor_module, rain_module, wind_module, other_modules = classifyModules(weatherData)
+
+    screen = Screen(width, height)
+    # the sizes are made for a 880x528 screen and scaled to the one of the panel
+    def x(size: int) -> int:
+        return round(size * screen.width / 880)
+    def y(size: int) -> int:
+        return round(size * screen.height / 528)
+    def text(size: int) -> int:
+        return round(size * min(screen.width / 880, screen.height / 528))
+    base_layout = VStack()
+    screen.setPadding(horizontal = x(10), vertical = y(10)).setView(base_layout)
+
+    # First row
+    # Left part
+    outdoor_module_widget = OutdoorModuleWidget(outdoor_module[0], main_module[0], 0.15).setWidth(x(335))
+
+    # Middle part
+    place = weatherData.stations[weatherData.default_station]['place']
+    ephemeris = SunEphemeris()
+    sunrise, sunset = ephemeris.sunTimes(place['location'][1], place['location'][0], datetime.fromtimestamp(now).date())
+    rise_time = ephemeris.localTime(sunrise, place['timezone']).strftime("%-H:%M") if sunrise != None else "?"
+    set_time = ephemeris.localTime(sunset, place['timezone']).strftime("%-H:%M") if sunset != None else "?"
+    logging.debug('Sunrise is %s and Sunset at %s', rise_time, set_time)
+
+    current_date = datetime.fromtimestamp(now).strftime('%d. %B')#.decode('utf-8')
+
+    date_display = TextWidget(current_date).setHeight(y(60)).setTextSize(text(50)).setTextAlignHorizontal(TextAlignHorizontal.CENTER)
+
+    sunrise_time = TextWidget(rise_time).setTextSize(text(18)).setTextAlignHorizontal(TextAlignHorizontal.RIGHT)
+    sunset_time = TextWidget(set_time).setTextSize(text(18)).setTextAlignHorizontal(TextAlignHorizontal.RIGHT)
+    sun_value = VStack().addView(sunrise_time).addView(sunset_time)
+    sunrise_text = TextWidget("Sonnenaufgang").setTextSize(text(18)).setTextAlignHorizontal(TextAlignHorizontal.LEFT).setTextAlignVertical(TextAlignVertical.BOTTOM)
+    sunset_text = TextWidget("Sonnenuntergang").setTextSize(text(18)).setTextAlignHorizontal(TextAlignHorizontal.LEFT).setTextAlignVertical(TextAlignVertical.BOTTOM)
+    sun_text = VStack().setLayoutWeight(3).addView(sunrise_text).addView(sunset_text)
+    sun_block = HStack().setGap(x(10)).addView(Spacer()).addView(sun_value).addView(sun_text).addView(Spacer())
+
+
+    min_temp = "?"
+    max_temp = "?"
+    if outdoor_module[0] and 'dashboard_data' in outdoor_module[0]:
+        min_temp = outdoor_module[0]['dashboard_data']['Temperature']
+        if 'min_temp' in outdoor_module[0]['dashboard_data']: # might be empty right after midnight
+            min_temp = outdoor_module[0]['dashboard_data']['min_temp']
+        max_temp = outdoor_module[0]['dashboard_data']['Temperature']
+        if 'max_temp' in outdoor_module[0]['dashboard_data']:
+            max_temp = outdoor_module[0]['dashboard_data']['max_temp']
+    temp_min_value = TextWidget(config.format_decimal(min_temp) + u'\N{DEGREE SIGN}').setTextSize(text(18)).setTextAlignHorizontal(TextAlignHorizontal.RIGHT)
+    temp_max_value = TextWidget(config.format_decimal(max_temp) + u'\N{DEGREE SIGN}').setTextSize(text(18)).setTextAlignHorizontal(TextAlignHorizontal.RIGHT)
+    temp_value = VStack().addView(temp_min_value).addView(temp_max_value)
+    temp_min_text = TextWidget("Min").setTextSize(text(18)).setTextAlignHorizontal(TextAlignHorizontal.LEFT)
+    temp_max_text = TextWidget("Max").setTextSize(text(18)).setTextAlignHorizontal(TextAlignHorizontal.LEFT)
+    temp_text = VStack().addView(temp_min_text).addView(temp_max_text)
+    temp_block = HStack().setGap(x(10)).addView(Spacer()).addView(temp_value).addView(temp_text).addView(Spacer())
+
+    date_corner = VStack().addView(date_display).addView(Spacer().setHeight(y(15))).addView(sun_block).addView(temp_block)
+
+    # Right Part
+    other_outdoor_widgets = VStack().setGap(y(15)).setWidth(x(160))
+    # Rain Module
+    if len(rain_module) > 0:
+        rain_module_widget = RainModuleWidget(rain_module[0], main_module[0], fetcher, 0.25, now = now)
+        other_outdoor_widgets.addView(rain_module_widget)
+    # Wind Module
+    if len(wind_module) > 0:
+        wind_module_widget = WindModuleWidget(wind_module[0], main_module[0], fetcher, 0.25, now = now)
+        other_outdoor_widgets.addView(wind_module_widget)
+
+    top_row = HStack().setGap(x(15)).addView(outdoor_module_widget).addView(date_corner).addView(other_outdoor_widgets).setHeight(y(185))
+    base_layout.addView(top_row)
+
+    # Second row
+    module_widgets_row = HStack().setHeight(y(115)).setGap(x(15)).setPadding(horizontal = 0, vertical = y(15))
+
+    # Main Module
+    main_module_widget = MainModuleWidget(main_module[0], 0.25)
+    module_widgets_row.addView(main_module_widget)
+
+    # Additional Modules
+    for module in other_modules:
+        other_module_widget = IndoorModuleWidget(module, 0.25)
+        module_widgets_row.addView(other_module_widget)
+
+    # Modules of the other stations
+    for station in StationRegistry().secondaryStations():
+        other_module_widget = MainModuleWidget(station, 0.25)
+        module_widgets_row.addView(other_module_widget)
+
+    base_layout.addView(module_widgets_row)
+
+    # Third row
+
+    base_layout.addView(GraphWidget(outdoor_module[0], main_module[0], fetcher, rain_module=(rain_module[0] if len(rain_module) > 0 else None), now=now, day_height=text(20), temp_size=text(10)))
+    return screen
+
+# Layouts a panel can name in its config section
+layouts = {'dashboard': buildScreen}
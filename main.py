@@ -1,16 +1,18 @@
 #!/usr/bin/python3
 
-from suntime import Sun
 import lnetatmo
-from datetime import datetime, timezone
+from datetime import datetime
 import time
-import pytz
 import os
 import sys
 import logging
 import locale
 from widgets import *
+from panels import Panel, PanelRenderer
+import importlib
 import signal
+import argparse
+import json
 
 libdir = "./e-Paper/RaspberryPi_JetsonNano/python/lib"
 if os.path.exists(libdir):
@@ -23,24 +25,52 @@ locale.setlocale(locale.LC_ALL, 'de_DE.UTF-8')
 
 # Get config
 config = ConfigHelper()
-refresh_interval = config.refresh_interval_s
+
+parser = argparse.ArgumentParser(description = 'Show the data of a Netatmo weather station on e-Paper displays.')
+parser.add_argument('--replay', metavar = 'LOG', help = 'run on a virtual clock against fake displays, answered from a recorded fixture or log')
+parser.add_argument('--days', type = float, help = 'days to replay, by default up to the end of the log')
+parser.add_argument('--replay-output', metavar = 'FILE', help = 'also write the replay summary as JSON')
+args = parser.parse_args()
+
+replay = None
+if args.replay:
+    from benchmarks.replay import Replay
+    replay = Replay.load(args.replay, duration = args.days * 86400 if args.days else None)
 
 # Configure logging
 numeric_level = getattr(logging, config.log_level, None)
 logging.basicConfig(filename='log.log',format='%(asctime)s %(levelname)s: %(message)s',level=numeric_level)
 
-if not config.export_image:
-    from waveshare_epd import epd7in5_HD as epd
+# Driver of the panel unless a [panel:<name>] section names another one
+default_driver = 'epd7in5_HD'
+
+panels = Panel.fromConfig(default_driver)
+renderer = PanelRenderer(panels)
+displays = {}
+if replay:
+    for panel in panels:
+        displays[panel.name] = DisplayUpdater(FakeEPD(panel.width, panel.height))
+elif not config.export_image:
     from waveshare_epd import epdconfig
-else:
-    epd = None
-    
+    for panel in panels:
+        displays[panel.name] = DisplayUpdater(importlib.import_module('waveshare_epd.' + panel.driver).EPD())
+
+frame_server = FrameServer(panels = [panel.name for panel in panels]).start() if config.server_enabled else None
+
 # Handle script exit
 def exit_handler(first=None, second=None):
     logging.info('Script stopped')
     logging.debug(first, second)
-    if not config.export_image:
-        epd.EPD().Clear()
+    renderer.close()
+    NetatmoTransport().close()
+    if frame_server:
+        frame_server.stop()
+    if config.export_image:
+        # images still queued are written before stopping
+        ImageExporter().close()
+    if not config.export_image and not replay:
+        for display in displays.values():
+            display.driver.Clear()
         epdconfig.module_exit()
     exit()
 
@@ -49,10 +79,12 @@ signal.signal(signal.SIGTERM, exit_handler)
 signal.signal(signal.SIGABRT, exit_handler)
 
 def renderToDisplay():
-    if epd:
+    if frame_server:
+        for name, image in last_images.items():
+            frame_server.publish(name, image)
+    for name, display in displays.items():
         try:
-            epd.EPD().Clear()
-            epd.EPD().display(epd.EPD().getbuffer(last_image))
+            display.update(last_images[name])
 
         except IOError as e:
             logging.info(e)
@@ -61,10 +93,10 @@ def renderToDisplay():
             exit_handler()
 
 def initDisplay():
-    if epd:
+    for display in displays.values():
         try:
             logging.info("Power up display")
-            epd.EPD().init()
+            display.driver.init()
 
         except IOError as e:
             logging.info(e)
@@ -72,31 +104,54 @@ def initDisplay():
         except KeyboardInterrupt:
             exit_handler()
 
-welcomeText = TextWidget("Netatmo").addTextLine("Display").setPadding(vertical = 100, horizontal = 100)
-welcomeScreen = Screen().setView(welcomeText)
-last_image = welcomeScreen.render()
+last_images = {}
+for panel in panels:
+    # the padding of the 880x528 screen, scaled to the panel
+    welcomeText = TextWidget("Netatmo").addTextLine("Display").setPadding(vertical = round(panel.height * 100 / 528), horizontal = round(panel.width * 100 / 880))
+    welcomeScreen = Screen(panel.width, panel.height).setView(welcomeText)
+    last_images[panel.name] = welcomeScreen.render()
+    del welcomeScreen
 initDisplay()
 renderToDisplay()
-del welcomeScreen
 
 def renderError(text: str):
-    global last_image
-    warning_text = TextWidget(text).setTextAlignHorizontal(TextAlignHorizontal.CENTER).setHeight(25).invert()
-    warning_message = VStack().addView(Spacer()).addView(warning_text).addView(Spacer())
-    layers = ZStack().addView(ImageWidget(last_image)).addView(warning_message)
-    screen = Screen().setView(layers)
-    last_image = screen.render()
+    for panel in panels:
+        warning_text = TextWidget(text).setTextAlignHorizontal(TextAlignHorizontal.CENTER).setHeight(25).invert()
+        warning_message = VStack().addView(Spacer()).addView(warning_text).addView(Spacer())
+        layers = ZStack().addView(ImageWidget(last_images[panel.name])).addView(warning_message)
+        screen = Screen(panel.width, panel.height).setView(layers)
+        last_images[panel.name] = screen.render()
+        del screen
     renderToDisplay()
-    del screen
 
+measure_store = MeasureStore(config.measure_store) if config.measure_store and not replay else None
+profiler = Profiler().install()
+if replay:
+    # every wait only moves the virtual clock, the stations data comes from the log
+    scheduler = RefreshScheduler(clock = replay.clock.time, sleep = replay.clock.sleep)
+    probe = replay.probe()
+else:
+    scheduler = RefreshScheduler()
+    # all API calls share kept alive connections
+    NetatmoTransport().install()
+    authorization = CachedClientAuth()
+    probe = StationProbe(authorization)
 startup = True
 lastUpdate = 0
-authorization = lnetatmo.ClientAuth()
+waiting_for_upload = False
 
-while True:
+while not replay or replay.isRunning():
     # Initiate Netatmo client
     try:
-        weatherData = lnetatmo.WeatherStationData(authorization)
+        if waiting_for_upload and probe.isReady():
+            # Only the upload time of the station is requested until the expected upload arrived
+            upload = probe.lastStatusStore()
+            if upload == lastUpdate or not scheduler.isDue(probe.station, upload):
+                logging.info("No new data in between, won't update display")
+                scheduler.wait(scheduler.noNewData(probe.station))
+                continue
+        weatherData = replay.weatherData() if replay else lnetatmo.WeatherStationData(authorization)
+        probe.remember(weatherData)
         # print(weatherData.rawData)
         # print(weatherData.default_station)
         # print(weatherData.stations)
@@ -104,150 +159,68 @@ while True:
     except Exception as e:
         if startup:
             logging.warning('No Data at sturtup, maybe no WiFi. Waiting 10 Seconds.')
-            time.sleep(10)
+            scheduler.wait(10)
             continue
         else: 
-            logging.warning('Fetching data failed! Waiting 20 Minutes.')
+            logging.warning('Fetching data failed!')
             logging.warning(e)
             renderError("Aktuelle Daten konnten nicht geladen werden.")
-            time.sleep(1200)
+            scheduler.wait(scheduler.failed())
             continue
 
     startup = False
 
     main_module = [weatherData.stations[weatherData.default_station]]
-    second_station = [weatherData.stations['Barbing (Keller)']]
-    outdoor_module = []
-    rain_module = []
-    wind_module = []
-    other_modules = []
 
     if main_module[0]["reachable"] == False:
-        logging.warning('Station not reachable! Waiting 20 Minutes.')
+        logging.warning('Station not reachable!')
         renderError("Station nicht verbunden.")
-        time.sleep(1200)
+        scheduler.wait(scheduler.failed())
         continue
 
     updateTimeUTC = main_module[0]["last_status_store"]
     updateTime = datetime.fromtimestamp(updateTimeUTC) 
     logging.info('Last update: %s', updateTime.strftime('%A, %d.%m.%Y %H:%M:%S'))
-    if (updateTimeUTC == lastUpdate):
-        logging.info("No new data in between, won't update display and sleep 60 sec")
-        time.sleep(60)
+    if (updateTimeUTC == lastUpdate or not scheduler.isDue(weatherData.default_station, updateTimeUTC)):
+        logging.info("No new data in between, won't update display")
+        waiting_for_upload = True
+        scheduler.wait(scheduler.noNewData(weatherData.default_station))
         continue
     else: 
         lastUpdate = updateTimeUTC
+        waiting_for_upload = False
 
-    for module in weatherData.modules.keys():
-        m_data_type = weatherData.modules[module]['data_type']
-        if ('Temperature' in m_data_type and 'CO2' not in m_data_type):
-            outdoor_module.append(weatherData.modules[module])
-        elif ('CO2' in m_data_type):
-            other_modules.append(weatherData.modules[module])
-        elif ('Wind' in m_data_type):
-            wind_module.append(weatherData.modules[module])
-        elif ('Rain' in m_data_type):
-            rain_module.append(weatherData.modules[module])
-
-    screen = Screen()
-    base_layout = VStack()
-    screen.setPadding(horizontal = 10, vertical = 10).setView(base_layout)
-
-    # First row
-    # Left part
-    outdoor_module_widget = OutdoorModuleWidget(outdoor_module[0], main_module[0], 0.15).setWidth(335)
-
-    # Middle part
-    coords = weatherData.stations[weatherData.default_station]['place']['location']
-    tzone = pytz.timezone(weatherData.stations[weatherData.default_station]['place']['timezone'])
-    sun = Sun(coords[1], coords[0])
-    rise_time = sun.get_sunrise_time().astimezone(tzone).strftime("%-H:%M")
-    set_time = sun.get_sunset_time().astimezone(tzone).strftime("%-H:%M")
-    logging.debug('Sunrise is %s and Sunset at %s', rise_time, set_time)
-
-    current_date = datetime.now().strftime('%d. %B')#.decode('utf-8')
-
-    date_display = TextWidget(current_date).setHeight(60).setTextSize(50).setTextAlignHorizontal(TextAlignHorizontal.CENTER)
-
-    sunrise_time = TextWidget(rise_time).setTextSize(18).setTextAlignHorizontal(TextAlignHorizontal.RIGHT)
-    sunset_time = TextWidget(set_time).setTextSize(18).setTextAlignHorizontal(TextAlignHorizontal.RIGHT)
-    sun_value = VStack().addView(sunrise_time).addView(sunset_time)
-    sunrise_text = TextWidget("Sonnenaufgang").setTextSize(18).setTextAlignHorizontal(TextAlignHorizontal.LEFT).setTextAlignVertical(TextAlignVertical.BOTTOM)
-    sunset_text = TextWidget("Sonnenuntergang").setTextSize(18).setTextAlignHorizontal(TextAlignHorizontal.LEFT).setTextAlignVertical(TextAlignVertical.BOTTOM)
-    sun_text = VStack().setLayoutWeight(3).addView(sunrise_text).addView(sunset_text)
-    sun_block = HStack().setGap(10).addView(Spacer()).addView(sun_value).addView(sun_text).addView(Spacer())
-
-
-    min_temp = "?"
-    max_temp = "?"
-    if outdoor_module[0] and 'dashboard_data' in outdoor_module[0]:
-        min_temp = outdoor_module[0]['dashboard_data']['Temperature']
-        if 'min_temp' in outdoor_module[0]['dashboard_data']: # might be empty right after midnight
-            min_temp = outdoor_module[0]['dashboard_data']['min_temp']
-        max_temp = outdoor_module[0]['dashboard_data']['Temperature']
-        if 'max_temp' in outdoor_module[0]['dashboard_data']: 
-            max_temp = outdoor_module[0]['dashboard_data']['max_temp']
-    temp_min_value = TextWidget(config.format_decimal(min_temp) + u'\N{DEGREE SIGN}').setTextSize(18).setTextAlignHorizontal(TextAlignHorizontal.RIGHT)
-    temp_max_value = TextWidget(config.format_decimal(max_temp) + u'\N{DEGREE SIGN}').setTextSize(18).setTextAlignHorizontal(TextAlignHorizontal.RIGHT)
-    temp_value = VStack().addView(temp_min_value).addView(temp_max_value)
-    temp_min_text = TextWidget("Min").setTextSize(18).setTextAlignHorizontal(TextAlignHorizontal.LEFT)
-    temp_max_text = TextWidget("Max").setTextSize(18).setTextAlignHorizontal(TextAlignHorizontal.LEFT)
-    temp_text = VStack().addView(temp_min_text).addView(temp_max_text)
-    temp_block = HStack().setGap(10).addView(Spacer()).addView(temp_value).addView(temp_text).addView(Spacer())
-
-    date_corner = VStack().addView(date_display).addView(Spacer().setHeight(15)).addView(sun_block).addView(temp_block)
-
-    # Right Part
-    other_outdoor_widgets = VStack().setGap(15).setWidth(160)
-    # Rain Module
-    if len(rain_module) > 0:
-        rain_module_widget = RainModuleWidget(rain_module[0], main_module[0], weatherData, 0.25)
-        other_outdoor_widgets.addView(rain_module_widget)
-    # Wind Module
-    if len(wind_module) > 0:
-        wind_module_widget = WindModuleWidget(wind_module[0], main_module[0], weatherData, 0.25)
-        other_outdoor_widgets.addView(wind_module_widget)
-
-    top_row = HStack().setGap(15).addView(outdoor_module_widget).addView(date_corner).addView(other_outdoor_widgets).setHeight(185)
-    base_layout.addView(top_row)
-
-    # Second row
-    module_widgets_row = HStack().setHeight(115).setGap(15).setPadding(horizontal = 0, vertical = 15)
-
-    # Main Module
-    main_module_widget = MainModuleWidget(main_module[0], 0.25)
-    module_widgets_row.addView(main_module_widget)
-
-    # Additional Modules
-    for module in other_modules:
-        other_module_widget = IndoorModuleWidget(module, 0.25)
-        module_widgets_row.addView(other_module_widget)
-
-    # Module from other station
-    if second_station[0]:
-        other_module_widget = MainModuleWidget(second_station[0], 0.25)
-        module_widgets_row.addView(other_module_widget)
-
-    base_layout.addView(module_widgets_row)
-
-    # Third row
-    
-    base_layout.addView(GraphWidget(outdoor_module[0], main_module[0], weatherData, rain_module=(rain_module[0] if len(rain_module) > 0 else None)))
+    # Measures of all panels are fetched together once their layouts are known
+    profiler.reset()
+    fetcher = MeasureFetcher(weatherData, store = measure_store)
     try:
-        last_image = screen.render()
+        started = time.perf_counter()
+        last_images.update(renderer.render(weatherData, fetcher, now = scheduler.clock()))
+        if replay:
+            replay.recordRender(time.perf_counter() - started)
+        metrics = TextMetrics()
+        logging.debug('Text metrics: %s hits, %s misses', metrics.hits, metrics.misses)
+        metrics.resetStatistics()
+        render_cache = RenderCache()
+        logging.debug('Render cache: %s hits, %s misses', render_cache.hits, render_cache.misses)
+        render_cache.resetStatistics()
+        profiler.write()
     except:
         logging.warning('Screen could not render.')
         renderError("Fehler")
-        time.sleep(1200)
+        scheduler.wait(scheduler.failed())
         continue
     
     # Draw image
     renderToDisplay()
-    del screen
 
-    # Wait time for next update
-    delta = (datetime.now() - updateTime).total_seconds()
-    logging.info('Update time ago: %s, need to wait: %s', delta, refresh_interval - delta) 
-    time.sleep((refresh_interval - delta) if (delta < refresh_interval) else 10)
+    # Wait for the next upload of the station
+    scheduler.wait(scheduler.refreshed(weatherData.default_station, updateTimeUTC))
 
-exit()
+if replay:
+    summary = replay.report(displays)
+    print(json.dumps(summary, indent = 2))
+    if args.replay_output:
+        with open(args.replay_output, 'w') as file:
+            json.dump(summary, file, indent = 2)
+exit_handler()
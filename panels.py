@@ -0,0 +1,115 @@
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self
+from widgets import *
+from dashboard import layouts
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import time
+import os
+import signal
+
+class Panel(object):
+    # A display driven by this script, with the size and layout of its screen
+    def __init__(self, name: str = '', width: int = None, height: int = None, layout: str = 'dashboard', driver: str = None, render_mode: str = None):
+        config = ConfigHelper()
+        if layout not in layouts:
+            raise ValueError('Unknown layout %s of panel %s' % (layout, name))
+        self.name = name
+        self.width = width if width else config.image_width
+        self.height = height if height else config.image_height
+        self.layout = layout
+        self.driver = driver
+        self.render_mode = render_mode if render_mode else config.render_mode
+
+    @classmethod
+    def fromConfig(cls, default_driver: str = None) -> list:
+        # Without [panel:<name>] sections there is one panel as given by the general section
+        config = ConfigHelper()
+        if not config.panel_sections:
+            return [cls(driver = default_driver)]
+        panels = []
+        for section in config.panel_sections:
+            options = config.config[section]
+            panels.append(cls(section.split(':', 1)[1], options.getint('width', fallback = None), options.getint('height', fallback = None), options.get('layout', fallback = 'dashboard'), options.get('driver', fallback = default_driver), options.get('render_mode', fallback = None)))
+        return panels
+
+    def buildScreen(self, weatherData, fetcher: MeasureFetcher, now: float = None) -> Screen:
+        screen = layouts[self.layout](weatherData, fetcher, self.width, self.height, now)
+        # the renderer saves the images, named after the panel
+        screen.save_image = False
+        return screen.setRenderMode(self.render_mode)
+
+    def exportPrefix(self) -> str:
+        return self.name + '-' if self.name else ''
+
+def initWorker():
+    # Stopping the script and clearing the displays is up to the main process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGABRT, signal.SIG_DFL)
+
+def renderPanel(panel: Panel, snapshot: StationSnapshot) -> tuple:
+    # Runs in a worker process, which keeps its caches from one refresh to the next.
+    # The profile of the worker goes along with the image, the main process writes it.
+    profiler = Profiler().reset()
+    image = panel.buildScreen(snapshot, snapshot, snapshot.now).render()
+    return image, profiler.root if profiler.enabled else None
+
+class PanelRenderer(object):
+    # Renders the screens of all panels from one fetch of the measures
+    def __init__(self, panels: list[Panel], processes: int = None):
+        self.panels = panels
+        processes = processes if processes != None else ConfigHelper().render_processes
+        self.processes = processes if processes > 0 else min(len(panels), os.cpu_count() or 1)
+        self.pool = None
+        self.screens = {}
+
+    def usesPool(self) -> bool:
+        # forked workers share the setup of the main script (e.g. the locale) without running it again
+        return len(self.panels) > 1 and self.processes > 1 and 'fork' in multiprocessing.get_all_start_methods()
+
+    def collect(self, weatherData, fetcher: MeasureFetcher, now: float) -> Self:
+        # The measures of all panels are requested before a single fetch
+        self.screens = {}
+        for panel in self.panels:
+            screen = panel.buildScreen(weatherData, fetcher, now)
+            screen.collectMeasures(fetcher)
+            self.screens[panel.name] = screen
+        fetcher.fetch()
+        return self
+
+    def render(self, weatherData, fetcher: MeasureFetcher, now: float = None) -> dict:
+        now = now if now != None else time.time()
+        self.collect(weatherData, fetcher, now)
+        if self.usesPool():
+            snapshot = StationSnapshot(weatherData, fetcher, now)
+            if not self.pool:
+                self.pool = ProcessPoolExecutor(max_workers = self.processes, mp_context = multiprocessing.get_context('fork'), initializer = initWorker)
+            try:
+                futures = [(panel.name, self.pool.submit(renderPanel, panel, snapshot)) for panel in self.panels]
+                results = {name: future.result() for name, future in futures}
+            except BrokenProcessPool:
+                # started again on the next refresh
+                self.close()
+                raise
+            images = {}
+            for name, (image, profile) in results.items():
+                images[name] = image
+                if profile:
+                    Profiler().merge(profile)
+        else:
+            images = {panel.name: self.screens[panel.name].render() for panel in self.panels}
+        self.screens = {}
+
+        if ConfigHelper().export_image:
+            for panel in self.panels:
+                ImageExporter().export(images[panel.name], panel.exportPrefix())
+        return images
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown(cancel_futures = True)
+            self.pool = None
@@ -0,0 +1,60 @@
+from PIL import Image, ImageChops, ImageDraw
+from widgets.DisplayUpdater import DisplayUpdater, FakeEPD
+
+def newUpdater(width: int = 200, height: int = 96) -> DisplayUpdater:
+    return DisplayUpdater(FakeEPD(width, height), partial_refresh = True, full_refresh_every = 10, partial_max_area = 0.5)
+
+def assertShows(driver: FakeEPD, image: Image):
+    assert ImageChops.difference(driver.frame.convert('L'), image.convert('1').convert('L')).getbbox() == None
+
+def test_first_update_is_full():
+    updater = newUpdater()
+    image = Image.new('L', (200, 96), 255)
+    ImageDraw.Draw(image).rectangle((10, 10, 50, 30), fill = 0)
+    assert updater.update(image) == [(0, 0, 200, 96)]
+    assert updater.driver.updates == [('clear', None), ('full', (0, 0, 200, 96))]
+    assertShows(updater.driver, image)
+
+def test_changed_regions_are_pushed_as_windows():
+    updater = newUpdater()
+    image = Image.new('L', (200, 96), 255)
+    updater.update(image)
+    changed = image.copy()
+    draw = ImageDraw.Draw(changed)
+    draw.rectangle((100, 50, 139, 60), fill = 0)
+    draw.text((20, 5), '12,3', fill = 0)
+    regions = updater.update(changed)
+    assert len(regions) == 2
+    assert updater.driver.updates[2:] == [('init_part', None)] + [('partial', region) for region in regions]
+    for left, top, right, bottom in regions:
+        assert left % 8 == 0
+    # the windows away from the top left corner show their own pixels
+    assert regions[1][0] > 0 and regions[1][1] > 0
+    assertShows(updater.driver, changed)
+
+def test_width_not_a_multiple_of_eight():
+    updater = newUpdater(width = 203)
+    image = Image.new('L', (203, 96), 255)
+    updater.update(image)
+    changed = image.copy()
+    ImageDraw.Draw(changed).line((190, 40, 202, 44), fill = 0)
+    regions = updater.update(changed)
+    assert regions[0][2] == 203
+    assertShows(updater.driver, changed)
+
+def test_large_changes_fall_back_to_full_refresh():
+    updater = newUpdater()
+    image = Image.new('L', (200, 96), 255)
+    updater.update(image)
+    changed = Image.new('L', (200, 96), 0)
+    assert updater.update(changed) == [(0, 0, 200, 96)]
+    assert updater.driver.updates[-1] == ('full', (0, 0, 200, 96))
+    assertShows(updater.driver, changed)
+
+def test_wrong_window_buffer_is_rejected():
+    driver = FakeEPD(200, 96)
+    try:
+        driver.display_Partial(driver.getbuffer(Image.new('1', (200, 96), 1)), 64, 16, 128, 32)
+    except ValueError:
+        return
+    assert False
@@ -0,0 +1,51 @@
+from PIL import Image
+from widgets.FrameServer import FrameServer
+from widgets.ImageEncoder import ImageEncoder
+import http.client
+import pytest
+
+@pytest.fixture
+def server():
+    server = FrameServer(host = '127.0.0.1', port = 0, max_wait = 5, panels = ['hallway', 'kitchen']).start()
+    yield server
+    server.stop()
+
+def get(server: FrameServer, path: str, headers: dict = {}) -> tuple:
+    connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout = 10)
+    connection.request('GET', path, headers = headers)
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+def test_unknown_panels_and_formats_are_not_found(server):
+    assert get(server, '/x/frame.png')[0].status == 404
+    assert get(server, '/frame.png')[0].status == 404
+    assert get(server, '/hallway/frame.gif')[0].status == 404
+
+def test_known_panel_without_frame_is_retried_later(server):
+    response, body = get(server, '/hallway/frame.png')
+    assert response.status == 503
+    assert response.getheader('Retry-After') == '10'
+
+def test_frames_are_served_until_they_change(server):
+    image = Image.new('L', (16, 8), 255)
+    server.publish('hallway', image)
+    response, body = get(server, '/hallway/frame.raw')
+    assert response.status == 200
+    assert body == image.convert('1').tobytes()
+    etag = response.getheader('ETag')
+    assert get(server, '/hallway/frame.raw', {'If-None-Match': etag})[0].status == 304
+    assert not server.publish('hallway', image.copy())
+    assert server.publish('hallway', Image.new('L', (16, 8), 0))
+    assert get(server, '/hallway/frame.raw', {'If-None-Match': etag})[0].status == 200
+
+def test_webp_is_only_served_if_pillow_can_encode_it(monkeypatch):
+    monkeypatch.setattr(ImageEncoder, 'available', staticmethod(lambda format: format != 'webp'))
+    server = FrameServer(host = '127.0.0.1', port = 0, panels = ['']).start()
+    try:
+        server.publish('', Image.new('L', (16, 8), 255))
+        assert get(server, '/frame.webp')[0].status == 404
+        assert get(server, '/frame.png')[0].status == 200
+    finally:
+        server.stop()
@@ -0,0 +1,41 @@
+from PIL import ImageChops
+from widgets import GraphWidget, StationRegistry
+from benchmarks.recorded import RecordedWeatherStationData, repeatMeasures
+import json
+import os
+import pytest
+
+pytest.importorskip('numpy')
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'benchmarks', 'fixtures', 'sample.json')
+
+def withMissingValues(fixture: dict) -> dict:
+    # leaves single values and runs of two and three between the blanks, the daily minimum and maximum are kept
+    for measure in fixture['measures']:
+        body = measure['response'].get('body')
+        if not measure['request']['optimize'] or not body or measure['request']['scale'] == '1day':
+            continue
+        for chunk in body:
+            chunk['value'] = [[None] * len(value) if i % 11 in (0, 2, 5, 6, 7) else value for i, value in enumerate(chunk['value'])]
+    return fixture
+
+def weatherData(missing: bool) -> tuple:
+    with open(FIXTURE) as file:
+        fixture = repeatMeasures(json.load(file), 45)
+    if missing:
+        fixture = withMissingValues(fixture)
+    return RecordedWeatherStationData(fixture, fixture['recorded_at']), fixture['recorded_at']
+
+@pytest.mark.parametrize('missing', [False, True])
+@pytest.mark.parametrize('width', [300, 880, 2000])
+@pytest.mark.parametrize('density', [1, 2, 4, 7])
+@pytest.mark.parametrize('line_width', [1, 3])
+def test_vectorized_drawing_gives_the_same_pixels(missing, width, density, line_width):
+    data, now = weatherData(missing)
+    registry = StationRegistry().update(data)
+    images = []
+    for vectorized in (False, True):
+        graph = GraphWidget(registry.modules('outdoor')[0], registry.station(), data, density = density, line_width = line_width, rain_module = registry.modules('rain')[0], rain_max = 5, vectorized = vectorized, now = now)
+        images.append(graph.setSize(width, 200).setPadding(vertical = 3, horizontal = 5).render())
+    # getbbox of an RGBA image only looks at the alpha band, the graph draws with transparent black
+    assert [band.getbbox() for band in ImageChops.difference(images[0], images[1]).split()] == [None] * 4
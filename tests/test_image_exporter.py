@@ -0,0 +1,58 @@
+from PIL import Image
+from widgets.ConfigHelper import Singleton
+from widgets.ImageExporter import ImageExporter
+import os
+import pytest
+
+@pytest.fixture(autouse = True)
+def newExporter():
+    # the exporter is a singleton, every test makes its own
+    Singleton._instances.pop(ImageExporter, None)
+    yield
+    exporter = Singleton._instances.pop(ImageExporter, None)
+    if exporter:
+        exporter.close()
+
+def exportAll(exporter: ImageExporter, count: int, prefix: str = '') -> list[Image.Image]:
+    images = [Image.new('L', (40, 20), i * 10) for i in range(count)]
+    for image in images:
+        exporter.writeAll(image, prefix, '%d.5' % (1_700_000_000 + images.index(image)))
+    return images
+
+def test_all_images_are_kept_by_default(tmp_path):
+    (tmp_path / '1600000000.123.png').write_bytes(b'older version')
+    exporter = ImageExporter(directory = str(tmp_path), formats = ['png'])
+    exportAll(exporter, 5)
+    assert len([name for name in os.listdir(tmp_path) if name != 'latest.png']) == 6
+
+def test_retention_keeps_the_newest_images_of_the_prefix(tmp_path):
+    (tmp_path / 'notes.png').write_bytes(b'not exported')
+    exporter = ImageExporter(directory = str(tmp_path), formats = ['png', 'raw'], keep_count = 2)
+    exportAll(exporter, 4, 'hallway-')
+    exportAll(exporter, 3)
+    names = sorted(os.listdir(tmp_path))
+    assert names == ['1700000001.5.png', '1700000001.5.raw', '1700000002.5.png', '1700000002.5.raw',
+        'hallway-1700000002.5.png', 'hallway-1700000002.5.raw', 'hallway-1700000003.5.png', 'hallway-1700000003.5.raw',
+        'hallway-latest.png', 'hallway-latest.raw', 'latest.png', 'latest.raw', 'notes.png']
+
+def test_retention_by_bytes_keeps_the_newest_image(tmp_path):
+    exporter = ImageExporter(directory = str(tmp_path), formats = ['raw'], keep_bytes = 1)
+    exportAll(exporter, 3)
+    assert sorted(os.listdir(tmp_path)) == ['1700000002.5.raw', 'latest.raw']
+
+def test_latest_points_to_the_newest_image(tmp_path):
+    exporter = ImageExporter(directory = str(tmp_path), formats = ['png', 'raw'], keep_count = 2)
+    images = exportAll(exporter, 3)
+    assert Image.open(tmp_path / 'latest.png').tobytes() == images[-1].tobytes()
+    assert (tmp_path / 'latest.raw').read_bytes() == images[-1].convert('1').tobytes()
+    if os.path.islink(tmp_path / 'latest.png'):
+        assert os.readlink(tmp_path / 'latest.png') == '1700000002.5.png'
+
+def test_export_writes_in_the_background(tmp_path):
+    exporter = ImageExporter(directory = str(tmp_path), formats = ['png'])
+    image = Image.new('L', (40, 20), 0)
+    exporter.export(image, 'p-')
+    # the screen may draw into the image again right away
+    image.paste(255, (0, 0, 40, 20))
+    exporter.flush()
+    assert Image.open(tmp_path / 'p-latest.png').getextrema() == (0, 0)
@@ -0,0 +1,79 @@
+from widgets.MeasurePlanner import MeasurePlanner
+
+STEP = 1800
+# points of the fake station are 7 minutes past the grid of the scale, with a gap of three points
+OFFSET = 1_700_000_000 - 1_700_000_000 % STEP + 420
+GAP = range(OFFSET + 40 * STEP, OFFSET + 43 * STEP)
+
+def value(timestamp: int, mtype: str) -> float:
+    return timestamp % 997 + len(mtype) / 10
+
+def getMeasure(request: dict) -> dict:
+    # Answers like the API for an optimized request: the points within the range, at most 1024,
+    # one chunk per run of points without gaps, single points without step_time
+    first = max(0, -(-(request['date_begin'] - OFFSET) // STEP))
+    timestamps = [OFFSET + i * STEP for i in range(first, first + MeasurePlanner.max_points)]
+    timestamps = [timestamp for timestamp in timestamps if timestamp <= request['date_end'] and timestamp not in GAP]
+    body = []
+    for timestamp in timestamps:
+        values = [value(timestamp, mtype) for mtype in request['mtype'].split(',')]
+        if body and timestamp == body[-1]['beg_time'] + len(body[-1]['value']) * STEP:
+            body[-1]['value'].append(values)
+            body[-1]['step_time'] = STEP
+        else:
+            body.append({'beg_time': timestamp, 'value': [values]})
+    return {'body': body, 'status': 'ok'}
+
+def measureRequest(mtype: str, begin: int, end: int, module_id: str = 'module') -> dict:
+    return {'device_id': 'station', 'module_id': module_id, 'scale': '30min', 'mtype': mtype, 'date_begin': begin, 'date_end': end, 'optimize': True, 'real_time': False, 'limit': None}
+
+def assertCutsMatch(requests: list[dict]) -> list[tuple]:
+    planner = MeasurePlanner()
+    calls = planner.plan(list(enumerate(requests)))
+    answered = []
+    for merged, members in calls:
+        measure = getMeasure(merged)
+        for key, request in members:
+            assert planner.cut(measure, merged, request) == getMeasure(request)
+            answered.append(key)
+    assert sorted(answered) == list(range(len(requests)))
+    return calls
+
+def test_overlapping_requests_are_merged():
+    calls = assertCutsMatch([
+        measureRequest('temperature,humidity', OFFSET, OFFSET + 100 * STEP),
+        measureRequest('pressure', OFFSET + 10 * STEP, OFFSET + 60 * STEP),
+        measureRequest('temperature', OFFSET + 90 * STEP, OFFSET + 150 * STEP)])
+    assert len(calls) == 1
+    assert calls[0][0]['mtype'] == 'temperature,humidity,pressure'
+
+def test_misaligned_ranges():
+    calls = assertCutsMatch([
+        measureRequest('temperature', OFFSET - 1000, OFFSET + 30 * STEP + 1),
+        measureRequest('temperature', OFFSET + 5 * STEP + 1, OFFSET + 50 * STEP - 1),
+        measureRequest('humidity', OFFSET + 20 * STEP - 419, OFFSET + 41 * STEP + 900),
+        measureRequest('humidity', OFFSET + 43 * STEP - 1, OFFSET + 44 * STEP - 1)])
+    assert len(calls) == 1
+
+def test_reordered_types():
+    calls = assertCutsMatch([
+        measureRequest('temperature,humidity', OFFSET, OFFSET + 48 * STEP),
+        measureRequest('humidity,temperature,pressure', OFFSET + 24 * STEP, OFFSET + 72 * STEP),
+        measureRequest('pressure,temperature', OFFSET + 12 * STEP, OFFSET + 30 * STEP)])
+    assert len(calls) == 1
+
+def test_clusters_stay_within_the_point_limit():
+    requests = [measureRequest('temperature' if i % 2 else 'humidity', OFFSET + i * 300 * STEP, OFFSET + (i * 300 + 400) * STEP) for i in range(8)]
+    calls = assertCutsMatch(requests)
+    assert 1 < len(calls) < len(requests)
+    for merged, members in calls:
+        assert (merged['date_end'] - merged['date_begin']) / STEP < MeasurePlanner.max_points
+
+def test_other_modules_and_limits_are_not_merged():
+    limited = dict(measureRequest('temperature', OFFSET, OFFSET + 10 * STEP), limit = 5)
+    calls = MeasurePlanner().plan(list(enumerate([
+        measureRequest('temperature', OFFSET, OFFSET + 10 * STEP),
+        measureRequest('temperature', OFFSET, OFFSET + 10 * STEP, module_id = 'other'),
+        limited])))
+    assert len(calls) == 3
+    assert [call for call in calls if call[0] is limited]
@@ -0,0 +1,81 @@
+from widgets.MeasureStore import MeasureStore
+import pytest
+
+STEP = 1800
+BEGIN = 1_700_000_000 - 1_700_000_000 % STEP
+# the station was offline for these points
+GAP = range(BEGIN + 20 * STEP, BEGIN + 23 * STEP)
+
+class FakeClient(object):
+    def __init__(self):
+        self.calls = []
+        self.fails = False
+
+    def getMeasure(self, device_id, scale, mtype, module_id = None, date_begin = None, date_end = None, limit = None, optimize = False, real_time = False):
+        self.calls.append((date_begin, date_end, real_time))
+        if self.fails:
+            raise TimeoutError('timed out')
+        first = BEGIN + max(0, -(-(date_begin - BEGIN) // STEP)) * STEP
+        body = []
+        for time in range(int(first), int(date_end) + 1, STEP):
+            if time in GAP:
+                continue
+            value = [time % 1000 / 10 + (100 if real_time else 0)]
+            if body and time == body[-1]['beg_time'] + len(body[-1]['value']) * STEP:
+                body[-1]['value'].append(value)
+            else:
+                body.append({'beg_time': time, 'step_time': STEP, 'value': [value]})
+        return {'body': body, 'status': 'ok'}
+
+def points(measure: dict) -> list:
+    return [(chunk['beg_time'] + i * chunk['step_time'], value) for chunk in measure['body'] for i, value in enumerate(chunk['value'])]
+
+def getMeasure(store: MeasureStore, client: FakeClient, begin: int, end: int, real_time: bool = False) -> dict:
+    return store.getMeasure(client, 'station', '30min', 'Temperature', 'module', BEGIN + begin * STEP, BEGIN + end * STEP, optimize = True, real_time = real_time)
+
+@pytest.fixture
+def store(tmp_path):
+    return MeasureStore(str(tmp_path / 'measures.sqlite'))
+
+def test_only_new_values_are_fetched(store):
+    client = FakeClient()
+    assert points(getMeasure(store, client, 0, 10)) == points(client.getMeasure('station', '30min', 'Temperature', 'module', BEGIN, BEGIN + 10 * STEP))
+    measure = getMeasure(store, client, 2, 15)
+    # the last stored value is fetched again, it may still change
+    assert client.calls[-1][0] == BEGIN + 10 * STEP
+    assert points(measure) == points(client.getMeasure('station', '30min', 'Temperature', 'module', BEGIN + 2 * STEP, BEGIN + 15 * STEP))
+
+def test_gap_after_the_covered_range(store):
+    client = FakeClient()
+    getMeasure(store, client, 0, 10)
+    getMeasure(store, client, 40, 50)
+    assert client.calls[-1][0] == BEGIN + 40 * STEP
+    # what lies between was never fetched, so the whole range is asked for
+    measure = getMeasure(store, client, 0, 50)
+    assert client.calls[-1][0] == BEGIN
+    assert points(measure) == points(client.getMeasure('station', '30min', 'Temperature', 'module', BEGIN, BEGIN + 50 * STEP))
+
+def test_failed_fetch_uses_stored_values(store):
+    client = FakeClient()
+    stored = getMeasure(store, client, 0, 10)
+    client.fails = True
+    assert points(getMeasure(store, client, 0, 12)) == points(stored)
+    with pytest.raises(TimeoutError):
+        getMeasure(store, client, 30, 40)
+
+def test_reload_rebuilds_the_chunks(tmp_path):
+    path = str(tmp_path / 'measures.sqlite')
+    client = FakeClient()
+    fetched = getMeasure(MeasureStore(path), client, 0, 30)
+    client.fails = True
+    reloaded = getMeasure(MeasureStore(path), client, 0, 30)
+    assert reloaded['body'] == fetched['body']
+    assert len(reloaded['body']) == 2
+
+def test_real_time_values_are_kept_apart(store):
+    client = FakeClient()
+    getMeasure(store, client, 0, 10)
+    real_time = getMeasure(store, client, 0, 10, real_time = True)
+    assert client.calls[-1] == (BEGIN, BEGIN + 10 * STEP, True)
+    assert points(real_time) == points(client.getMeasure('station', '30min', 'Temperature', 'module', BEGIN, BEGIN + 10 * STEP, real_time = True))
+    assert points(getMeasure(store, client, 0, 10))[0][1] == [BEGIN % 1000 / 10]
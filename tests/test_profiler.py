@@ -0,0 +1,23 @@
+from widgets.Profiler import Profiler, ProfileNode
+
+def profile(*calls: tuple) -> ProfileNode:
+    root = ProfileNode('refresh')
+    for path, time in calls:
+        node = root
+        for name in path:
+            node = node.child(name)
+        node.calls += 1
+        node.time += time
+        node.pixels += 10
+    return root
+
+def test_worker_profiles_are_merged_below_the_current_node():
+    profiler = Profiler(enabled = True, path = 'profile').reset()
+    profiler.root.add(profile((('Screen.render',), 0.5)))
+    profiler.merge(profile((('Screen.render',), 0.25), (('Screen.render', 'GraphWidget.render'), 0.125)))
+    profiler.merge(profile((('Screen.render', 'GraphWidget.render'), 0.125)))
+    screen = profiler.root.children['Screen.render']
+    assert (screen.calls, screen.time, screen.pixels) == (2, 0.75, 20)
+    graph = screen.children['GraphWidget.render']
+    assert (graph.calls, graph.time, graph.pixels) == (2, 0.25, 20)
+    assert profiler.report()[2].split()[:3] == ['Screen.render', '2', '750.00']
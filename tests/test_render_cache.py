@@ -0,0 +1,33 @@
+from PIL import Image
+from widgets.ConfigHelper import Singleton
+from widgets.RenderCache import RenderCache
+import pytest
+
+@pytest.fixture(autouse = True)
+def newCache():
+    # the cache is a singleton, every test makes its own with the limits it needs
+    Singleton._instances.pop(RenderCache, None)
+    yield
+    Singleton._instances.pop(RenderCache, None)
+
+def test_oldest_images_go_when_the_bytes_are_exceeded():
+    cache = RenderCache(max_size = 10, max_bytes = 3 * 100 * 100 * 4)
+    images = [Image.new('RGBA', (100, 100)) for i in range(4)]
+    for i, image in enumerate(images):
+        cache.put(('view', i), image)
+    assert cache.bytes == 3 * 100 * 100 * 4
+    assert cache.get(('view', 0)) == None
+    assert cache.get(('view', 3)) is images[3]
+
+def test_grayscale_images_take_a_byte_per_pixel():
+    cache = RenderCache(max_size = 10, max_bytes = 100 * 100 * 4)
+    for i in range(4):
+        cache.put(('view', i), Image.new('L', (100, 100)))
+    assert len(cache.images) == 4
+    cache.put(('view', 0), Image.new('L', (100, 100)))
+    assert cache.bytes == 4 * 100 * 100
+
+def test_images_larger_than_the_limit_are_not_kept():
+    cache = RenderCache(max_size = 10, max_bytes = 1000)
+    cache.put(('view', 0), Image.new('RGBA', (100, 100)))
+    assert cache.get(('view', 0)) == None and cache.bytes == 0
@@ -0,0 +1,46 @@
+from widgets.NetatmoTransport import CachedClientAuth
+import json
+import pytest
+import time
+
+@pytest.fixture(autouse = True)
+def noEnvironment(monkeypatch):
+    for name in ('CLIENT_ID', 'CLIENT_SECRET', 'REFRESH_TOKEN'):
+        monkeypatch.delenv(name, raising = False)
+
+def renewWith(monkeypatch, refresh_token: str):
+    def renew_token(self):
+        self.refreshToken = refresh_token
+        self._accessToken = 'access ' + refresh_token
+        self.expiration = time.time() + 10800
+    monkeypatch.setattr(CachedClientAuth, 'renew_token', renew_token)
+
+def test_cache_is_used_while_the_credentials_are_the_same(tmp_path, monkeypatch):
+    cache = str(tmp_path / 'token')
+    renewWith(monkeypatch, 'r1')
+    assert CachedClientAuth(path = cache, refresh_margin = 600, clientId = 'c', clientSecret = 's', refreshToken = 'r0').accessToken == 'access r1'
+    renewWith(monkeypatch, 'r2')
+    auth = CachedClientAuth(path = cache, refresh_margin = 600, clientId = 'c', clientSecret = 's', refreshToken = 'r0')
+    assert auth.refreshToken == 'r1'
+    assert auth.accessToken == 'access r1'
+
+def test_new_credentials_replace_the_cache(tmp_path, monkeypatch):
+    cache = str(tmp_path / 'token')
+    renewWith(monkeypatch, 'r1')
+    CachedClientAuth(path = cache, refresh_margin = 600, clientId = 'c', clientSecret = 's', refreshToken = 'r0').accessToken
+    renewWith(monkeypatch, 'n1')
+    auth = CachedClientAuth(path = cache, refresh_margin = 600, clientId = 'c', clientSecret = 's', refreshToken = 'n0')
+    assert auth.refreshToken == 'n0'
+    assert auth.accessToken == 'access n1'
+    assert json.load(open(cache))['credentials_refresh_token'] == 'n0'
+
+def test_credential_file_keeps_up_with_renewed_tokens(tmp_path, monkeypatch):
+    cache = str(tmp_path / 'token')
+    credentials = tmp_path / 'credentials'
+    credentials.write_text(json.dumps({'client_id': 'c', 'client_secret': 's', 'refresh_token': 'r0'}))
+    renewWith(monkeypatch, 'r1')
+    CachedClientAuth(path = cache, refresh_margin = 600, credentialFile = str(credentials)).accessToken
+    # lnetatmo writes the renewed token to the credential file
+    credentials.write_text(json.dumps({'client_id': 'c', 'client_secret': 's', 'refresh_token': 'r1'}))
+    renewWith(monkeypatch, 'r2')
+    assert CachedClientAuth(path = cache, refresh_margin = 600, credentialFile = str(credentials)).accessToken == 'access r1'
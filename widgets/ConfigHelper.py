@@ -27,11 +27,45 @@ class ConfigHelper(metaclass=Singleton):
     export_image: bool = config.getboolean('general','export_image', fallback=False)
     image_width: int = config.getint('general', 'image_width', fallback=880)
     image_height: int = config.getint('general', 'image_height', fallback=528)
+    fetch_concurrency: int = config.getint('general', 'fetch_concurrency', fallback=4)
+    coalesce_measures: bool = config.getboolean('general', 'coalesce_measures', fallback=True)
+    measure_store: str = config.get('general', 'measure_store', fallback="")
+    secondary_stations: list[str] = [name.strip() for name in config.get('general', 'secondary_stations', fallback="").split(',') if name.strip()]
+    sun_table: str = config.get('general', 'sun_table', fallback="")
+    render_cache_size: int = config.getint('general', 'render_cache_size', fallback=128)
+    render_cache_bytes: int = config.getint('general', 'render_cache_bytes', fallback=33554432)
+    render_mode: str = config.get('general', 'render_mode', fallback="RGBA")
+    glyph_atlas: bool = config.getboolean('general', 'glyph_atlas', fallback=True)
+    render_processes: int = config.getint('general', 'render_processes', fallback=0)
+    profile: bool = config.getboolean('general', 'profile', fallback=False)
+    profile_path: str = config.get('general', 'profile_path', fallback="profile")
+    netatmo_api_url: str = config.get('netatmo', 'api_url', fallback="https://api.netatmo.com/")
+    netatmo_token_cache: str = config.get('netatmo', 'token_cache', fallback="")
+    netatmo_token_refresh_margin_s: int = config.getint('netatmo', 'token_refresh_margin_s', fallback=600)
+    display_partial_refresh: bool = config.getboolean('display', 'partial_refresh', fallback=True)
+    display_full_refresh_every: int = config.getint('display', 'full_refresh_every', fallback=10)
+    display_partial_max_area: float = config.getfloat('display', 'partial_max_area', fallback=0.3)
+    export_directory: str = config.get('export', 'directory', fallback=".")
+    export_formats: list[str] = [format.strip() for format in config.get('export', 'formats', fallback="png").split(',')]
+    export_png_compress_level: int = config.getint('export', 'png_compress_level', fallback=1)
+    export_keep_count: int = config.getint('export', 'keep_count', fallback=0)
+    export_keep_bytes: int = config.getint('export', 'keep_bytes', fallback=0)
+    server_enabled: bool = config.getboolean('server', 'enabled', fallback=False)
+    server_host: str = config.get('server', 'host', fallback="0.0.0.0")
+    server_port: int = config.getint('server', 'port', fallback=8080)
+    server_max_wait_s: float = config.getfloat('server', 'max_wait_s', fallback=300)
+    scheduler_upload_delay_s: int = config.getint('scheduler', 'upload_delay_s', fallback=30)
+    scheduler_backoff_base_s: int = config.getint('scheduler', 'backoff_base_s', fallback=60)
+    scheduler_backoff_max_s: int = config.getint('scheduler', 'backoff_max_s', fallback=1200)
+    wind_history_days: float = config.getfloat('wind', 'history_days', fallback=1)
+    wind_rose_sectors: int = config.getint('wind', 'rose_sectors', fallback=36)
     highlight_humidity_max: int = config.getint('highlight', 'humidity_max', fallback=60)
     highlight_co2_max: int = config.getint('highlight', 'co2_max', fallback=2000)
     highlight_battery_min: int = config.getint('highlight', 'battery_min', fallback=15)
     highlight_calm_max: int = config.getint('highlight', 'calm_max', fallback=2)
     highlight_wind_max: int = config.getint('highlight', 'wind_max', fallback=50)
+    # Every [panel:<name>] section is a screen rendered from the same data
+    panel_sections: list[str] = [section for section in config.sections() if section.startswith('panel:')]
 
     def format_decimal(self, value) -> str:
         return str(round(float(value), 1)).replace(".", self.decimal_marker)
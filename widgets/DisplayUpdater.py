@@ -0,0 +1,133 @@
+from .ConfigHelper import ConfigHelper
+from PIL import Image, ImageChops
+import logging
+
+class FakeEPD(object):
+    # Stands in for a waveshare driver and records what would have been pushed to the panel
+    def __init__(self, width: int = None, height: int = None):
+        config = ConfigHelper()
+        self.width = width if width else config.image_width
+        self.height = height if height else config.image_height
+        self.frame = Image.new('1', (self.width, self.height), 1)
+        self.updates = []
+
+    def init(self):
+        self.updates.append(('init', None))
+
+    def init_part(self):
+        self.updates.append(('init_part', None))
+
+    def Clear(self):
+        self.frame = Image.new('1', (self.width, self.height), 1)
+        self.updates.append(('clear', None))
+
+    def getbuffer(self, image: Image) -> bytearray:
+        # rows of packed bits like the drivers send them, most significant bit first, 1 is white
+        return bytearray(image.convert('1').tobytes())
+
+    def unpack(self, buffer: bytearray, width: int, height: int) -> Image:
+        row_bytes = -(-width // 8)
+        if len(buffer) != row_bytes * height:
+            raise ValueError('Buffer of %s bytes for a %sx%s window' % (len(buffer), width, height))
+        return Image.frombytes('1', (row_bytes * 8, height), bytes(buffer)).crop((0, 0, width, height))
+
+    def display(self, buffer: bytearray):
+        self.frame = self.unpack(buffer, self.width, self.height)
+        self.updates.append(('full', (0, 0, self.width, self.height)))
+
+    def display_Partial(self, buffer: bytearray, x_start: int, y_start: int, x_end: int, y_end: int):
+        # like the drivers, the buffer only holds the rows of the window
+        box = (x_start, y_start, x_end, y_end)
+        self.frame.paste(self.unpack(buffer, x_end - x_start, y_end - y_start), box)
+        self.updates.append(('partial', box))
+
+class DisplayUpdater(object):
+    def __init__(self, driver, partial_refresh: bool = None, full_refresh_every: int = None, partial_max_area: float = None, band_height: int = 16):
+        config = ConfigHelper()
+        self.driver = driver
+        self.partial_refresh = partial_refresh if partial_refresh != None else config.display_partial_refresh
+        self.full_refresh_every = full_refresh_every if full_refresh_every != None else config.display_full_refresh_every
+        self.partial_max_area = partial_max_area if partial_max_area != None else config.display_partial_max_area
+        self.band_height = band_height
+        self.last_frame = None
+        self.partial_updates = 0
+        self.partial_mode = False
+
+    def supportsPartial(self) -> bool:
+        # the 7.5" HD driver has no partial mode, smaller waveshare panels do
+        return self.partial_refresh and hasattr(self.driver, 'display_Partial')
+
+    def changedRegions(self, old: Image, new: Image) -> list[tuple]:
+        # Compare both frames as the panel sees them and merge changed bands into rectangles
+        if old.size != new.size:
+            return [(0, 0, new.width, new.height)]
+        diff = ImageChops.logical_xor(old, new)
+        regions = []
+        current = None
+        for top in range(0, new.height, self.band_height):
+            bottom = min(top + self.band_height, new.height)
+            bbox = diff.crop((0, top, new.width, bottom)).getbbox()
+            if not bbox:
+                if current:
+                    regions.append(current)
+                    current = None
+                continue
+            # partial windows start and end on whole bytes of the 1-bit buffer
+            left = bbox[0] // 8 * 8
+            right = min(-(-bbox[2] // 8) * 8, new.width)
+            if current:
+                current = (min(current[0], left), current[1], max(current[2], right), bottom)
+            else:
+                current = (left, top, right, bottom)
+        if current:
+            regions.append(current)
+        return regions
+
+    def windowBuffer(self, buffer: bytearray, region: tuple, width: int) -> bytearray:
+        # The drivers read a partial buffer as the rows of the window only. They are cut from the
+        # buffer of the whole frame, which is image.crop(region) packed in the driver's own bit order.
+        row_bytes = -(-width // 8)
+        left = region[0] // 8
+        right = -(-region[2] // 8)
+        window = bytearray()
+        for y in range(region[1], region[3]):
+            window += buffer[y * row_bytes + left:y * row_bytes + right]
+        return window
+
+    def update(self, image: Image) -> list[tuple]:
+        frame = image.convert('1')
+        if self.last_frame == None:
+            regions = [(0, 0, frame.width, frame.height)]
+        else:
+            regions = self.changedRegions(self.last_frame, frame)
+        if not regions:
+            logging.info('Frame unchanged, skipping display update')
+            return regions
+
+        changed_area = sum((r[2] - r[0]) * (r[3] - r[1]) for r in regions)
+        use_partial = self.last_frame != None and self.supportsPartial() \
+            and self.partial_updates < self.full_refresh_every \
+            and changed_area <= self.partial_max_area * frame.width * frame.height
+
+        buffer = self.driver.getbuffer(image)
+        if use_partial:
+            if not self.partial_mode and hasattr(self.driver, 'init_part'):
+                self.driver.init_part()
+            self.partial_mode = True
+            for region in regions:
+                self.driver.display_Partial(self.windowBuffer(buffer, region, frame.width), *region)
+            self.partial_updates += 1
+            logging.info('Partial display update of %s regions (%s pixels)', len(regions), changed_area)
+        else:
+            if self.partial_mode:
+                self.driver.init()
+            self.partial_mode = False
+            # a full refresh also clears ghosting left by the partial updates before it
+            self.driver.Clear()
+            self.driver.display(buffer)
+            self.partial_updates = 0
+            regions = [(0, 0, frame.width, frame.height)]
+            logging.info('Full display update')
+
+        self.last_frame = frame
+        return regions
@@ -0,0 +1,27 @@
+from .ConfigHelper import Singleton
+from PIL import ImageFont
+from collections import OrderedDict
+import os
+
+class FontCache(metaclass=Singleton):
+    default_font = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'Font.ttc')
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self.fonts = OrderedDict()
+
+    def getFont(self, size: int, path: str = None) -> ImageFont.FreeTypeFont:
+        # Loaded fonts are shared process wide and evicted least recently used first
+        key = (path if path else self.default_font, size)
+        font = self.fonts.get(key)
+        if font:
+            self.fonts.move_to_end(key)
+            return font
+        font = ImageFont.truetype(key[0], size)
+        self.fonts[key] = font
+        if len(self.fonts) > self.max_size:
+            self.fonts.popitem(last = False)
+        return font
+
+    def clear(self):
+        self.fonts.clear()
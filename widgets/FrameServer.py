@@ -0,0 +1,162 @@
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self
+from .ConfigHelper import ConfigHelper
+from .ImageEncoder import ImageEncoder
+from PIL import Image
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import hashlib
+import logging
+import threading
+import time
+
+class Frame(object):
+    # A rendered screen and its encoded bodies, each one encoded by the first request asking for it
+    def __init__(self, image: Image, encoder: ImageEncoder):
+        self.image = image
+        self.encoder = encoder
+        digest = hashlib.blake2b(digest_size = 12)
+        digest.update(('%s %s %s ' % (image.mode, image.width, image.height)).encode())
+        digest.update(image.tobytes())
+        self.digest = digest.hexdigest()
+        self.bodies = {}
+        self.lock = threading.Lock()
+
+    def etag(self, format: str) -> str:
+        return '"%s-%s"' % (self.digest, format)
+
+    def body(self, format: str) -> bytes:
+        with self.lock:
+            body = self.bodies.get(format)
+            if body == None:
+                body = self.bodies[format] = self.encoder.encode(self.image, format)
+        return body
+
+class FrameRequestHandler(BaseHTTPRequestHandler):
+    # keep-alive, so pollers don't connect again for every frame
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.frame_server.respond(self, send_body = True)
+
+    def do_HEAD(self):
+        self.server.frame_server.respond(self, send_body = False)
+
+    def log_message(self, format, *args):
+        logging.debug('Frame server: ' + format, *args)
+
+class FrameHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # many pollers connect at once, the default backlog of 5 delays them by seconds
+    request_queue_size = 256
+
+    def handle_error(self, request, client_address):
+        # mostly clients that went away while waiting
+        logging.debug('Frame server: request of %s failed', client_address, exc_info = True)
+
+class FrameServer(object):
+    # Serves the latest screen of every panel at /frame.<format> or /<panel>/frame.<format>.
+    # ?wait=<seconds> together with If-None-Match holds the request until a different frame is published.
+    # Panels are named like their [panel:<name>] section, the only one of a config without any is ''.
+    def __init__(self, host: str = None, port: int = None, max_wait: float = None, panels: list[str] = None):
+        config = ConfigHelper()
+        self.host = host if host != None else config.server_host
+        self.port = port if port != None else config.server_port
+        self.max_wait = max_wait if max_wait != None else config.server_max_wait_s
+        self.panels = set(panels) if panels != None else {''}
+        self.encoder = ImageEncoder()
+        self.formats = [format for format in ImageEncoder.content_types if ImageEncoder.available(format)]
+        self.frames = {}
+        self.condition = threading.Condition()
+        self.httpd = None
+
+    def start(self) -> Self:
+        self.httpd = FrameHTTPServer((self.host, self.port), FrameRequestHandler)
+        self.httpd.frame_server = self
+        # the port actually bound, e.g. when asked for any free one
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target = self.httpd.serve_forever, name = 'FrameServer', daemon = True).start()
+        logging.info('Frame server listening on %s:%s', self.host, self.port)
+        return self
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def publish(self, panel: str, image: Image) -> bool:
+        # A render that looks like the current frame keeps its ETag and doesn't wake the pollers
+        frame = Frame(image.copy(), self.encoder)
+        with self.condition:
+            current = self.frames.get(panel)
+            if current and current.digest == frame.digest:
+                return False
+            self.frames[panel] = frame
+            self.condition.notify_all()
+        return True
+
+    def route(self, path: str) -> tuple:
+        parts = path.strip('/').split('/')
+        if len(parts) > 2 or not parts[-1].startswith('frame.'):
+            return None, None
+        format = parts[-1][len('frame.'):]
+        panel = parts[0] if len(parts) == 2 else ''
+        if format not in self.formats or panel not in self.panels:
+            return None, None
+        return panel, format
+
+    def matches(self, if_none_match: str, etag: str) -> bool:
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags or 'W/' + etag in tags
+
+    def respond(self, handler: BaseHTTPRequestHandler, send_body: bool):
+        url = urlsplit(handler.path)
+        panel, format = self.route(url.path)
+        if format == None:
+            handler.send_error(404)
+            return
+        try:
+            wait = min(float(parse_qs(url.query).get('wait', ['0'])[0]), self.max_wait)
+        except ValueError:
+            handler.send_error(400, 'wait has to be a number of seconds')
+            return
+
+        if_none_match = handler.headers.get('If-None-Match')
+        deadline = time.monotonic() + wait
+        with self.condition:
+            frame = self.frames.get(panel)
+            while frame and self.matches(if_none_match, frame.etag(format)) and time.monotonic() < deadline:
+                self.condition.wait(deadline - time.monotonic())
+                frame = self.frames.get(panel)
+
+        if not frame:
+            # a known panel that wasn't rendered yet
+            handler.send_response(503)
+            handler.send_header('Retry-After', '10')
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+        etag = frame.etag(format)
+        if self.matches(if_none_match, etag):
+            handler.send_response(304)
+            handler.send_header('ETag', etag)
+            handler.send_header('Cache-Control', 'no-cache')
+            handler.end_headers()
+            return
+
+        body = frame.body(format)
+        handler.send_response(200)
+        handler.send_header('Content-Type', ImageEncoder.content_types[format])
+        handler.send_header('Content-Length', str(len(body)))
+        handler.send_header('ETag', etag)
+        handler.send_header('Cache-Control', 'no-cache')
+        handler.send_header('X-Frame-Width', str(frame.image.width))
+        handler.send_header('X-Frame-Height', str(frame.image.height))
+        handler.end_headers()
+        if send_body:
+            handler.wfile.write(body)
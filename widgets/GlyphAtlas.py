@@ -0,0 +1,98 @@
+from .ConfigHelper import Singleton
+from .FontCache import FontCache
+from PIL import Image, ImageDraw, ImageFont
+from collections import OrderedDict
+import math
+
+class GlyphAtlas(metaclass=Singleton):
+    # Characters of the readings and their units, any other text is drawn by FreeType
+    charset = frozenset('0123456789,.-+?%/ \N{DEGREE SIGN}abhkmprt')
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self.glyphs = OrderedDict()
+        self.advances = {}
+        self.kernings = {}
+        self.hits = 0
+        self.misses = 0
+
+    def supports(self, text: str, size: int, path: str = None) -> bool:
+        # Glyphs are placed like the basic layout does it, shaping with raqm could move them
+        return all(c in self.charset for c in text) and FontCache().getFont(size, path).layout_engine == ImageFont.Layout.BASIC
+
+    def advance(self, font: ImageFont, key: tuple, char: str) -> float:
+        advance = self.advances.get(key + (char,))
+        if advance == None:
+            advance = self.advances[key + (char,)] = font.getlength(char)
+        return advance
+
+    def kerning(self, font: ImageFont, key: tuple, left: str, right: str) -> float:
+        kerning = self.kernings.get(key + (left, right))
+        if kerning == None:
+            kerning = self.kernings[key + (left, right)] = font.getlength(left + right) - self.advance(font, key, left) - self.advance(font, key, right)
+        return kerning
+
+    def glyph(self, font: ImageFont, key: tuple, char: str, start: tuple) -> tuple:
+        # A glyph looks different depending on the fraction of a pixel it starts at, so that is part of the key
+        glyph_key = key + (char, start)
+        glyph = self.glyphs.get(glyph_key)
+        if glyph:
+            self.hits += 1
+            self.glyphs.move_to_end(glyph_key)
+            return glyph
+        self.misses += 1
+        mask, offset = font.getmask2(char, 'L', start = start)
+        image = Image.frombytes('L', mask.size, bytes(mask)) if mask.size[0] and mask.size[1] else None
+        glyph = self.glyphs[glyph_key] = (image, offset)
+        if len(self.glyphs) > self.max_size:
+            self.glyphs.popitem(last = False)
+        return glyph
+
+    def drawText(self, draw: ImageDraw, xy: tuple, text: str, size: int, fill, path: str = None):
+        # Same pixels as draw.text, put together from cached glyphs
+        font = FontCache().getFont(size, path)
+        key = (path if path else FontCache.default_font, size)
+        x, y = xy
+        start_y = math.modf(y)[0]
+        pieces = []
+        pen = 0.0
+        for i, char in enumerate(text):
+            if i > 0:
+                pen += self.advance(font, key, text[i - 1]) + self.kerning(font, key, text[i - 1], char)
+            glyph_x = x + pen
+            image, offset = self.glyph(font, key, char, (math.modf(glyph_x)[0], start_y))
+            if image:
+                pieces.append((int(glyph_x) + offset[0], int(y) + offset[1], image))
+        if not pieces:
+            return
+
+        left = min(piece[0] for piece in pieces)
+        top = min(piece[1] for piece in pieces)
+        right = max(piece[0] + piece[2].width for piece in pieces)
+        bottom = max(piece[1] + piece[2].height for piece in pieces)
+        mask = Image.new('L', (right - left, bottom - top), 0)
+        covered = 0
+        for glyph_x, glyph_y, image in pieces:
+            box = (glyph_x - left, glyph_y - top, glyph_x - left + image.width, glyph_y - top + image.height)
+            overlap = None
+            if box[0] < covered:
+                # FreeType blends the coverage of overlapping glyphs like two layers of ink
+                overlap_box = (box[0], box[1], min(covered, box[2]), box[3])
+                below = mask.crop(overlap_box).tobytes()
+                above = image.crop((0, 0, overlap_box[2] - box[0], image.height)).tobytes()
+                overlap = Image.frombytes('L', (overlap_box[2] - overlap_box[0], image.height), bytes(255 - ((255 - a) * (255 - b) + 127) // 255 for a, b in zip(below, above)))
+            mask.paste(image, box)
+            if overlap:
+                mask.paste(overlap, overlap_box)
+            covered = max(covered, box[2])
+        draw.bitmap((left, top), mask, fill = fill)
+
+    def resetStatistics(self):
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.glyphs.clear()
+        self.advances.clear()
+        self.kernings.clear()
+        self.resetStatistics()
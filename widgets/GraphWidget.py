@@ -4,12 +4,20 @@ except ImportError:
     from typing_extensions import Self
 from .View import View
 from .ConfigHelper import ConfigHelper
-from PIL import Image, ImageDraw, ImageFont
+from .FontCache import FontCache
+from .TextMetrics import TextMetrics
+from .MeasureSeries import MeasureSeries
+from .SunEphemeris import SunEphemeris
+from PIL import Image, ImageDraw
 from datetime import datetime, timezone, timedelta
 from lnetatmo import WeatherStationData
+try:
+    import numpy
+except ImportError:
+    numpy = None
+import bisect
 import logging
 import math
-import os
 
 class DataPoint(object):
     timestamp: datetime = None
@@ -26,11 +34,14 @@ class DataPoint(object):
         return f"timestamp: {self.timestamp}, x_position: {self.x_position}, temp_value: {self.temp_value}, rain_value: {self.rain_value}, day_text: {self.day_text}, day_values: {self.day_values}, is_midnight: {self.is_midnight}, show_tick: {self.show_tick}, is_latest: {self.is_latest}"
     
 class GraphWidget(View):
-    def __init__(self, temperature_module, main_module, netatmo_client: WeatherStationData, density: int = 4, show_days: bool = True, day_height: int = 20, temp_min: int = -10, temp_max: int = 40, temp_steps: int = 10, temp_size: int = 10, indicator_size: int = 3, line_width: int = 1, current_value_radius: int = 2, hour_tick_interval: int = 6, rain_module = None, rain_max: int = 10, rain_steps: int = 10):
+    night_patterns = {}
+
+    def __init__(self, temperature_module, main_module, netatmo_client: WeatherStationData, density: int = 4, show_days: bool = True, day_height: int = 20, temp_min: int = -10, temp_max: int = 40, temp_steps: int = 10, temp_size: int = 10, indicator_size: int = 3, line_width: int = 1, current_value_radius: int = 2, hour_tick_interval: int = 6, rain_module = None, rain_max: int = 10, rain_steps: int = 10, vectorized: bool = True, now: float = None, night_shading: bool = False):
         super().__init__()
         self.temperature_module = temperature_module
         self.main_module = main_module
         self.netatmo_client = netatmo_client
+        self.now = now if now != None else datetime.now(timezone.utc).timestamp()
         self.setDensity(density)
         self.setShowDays(show_days)
         self.setDayHeight(day_height)
@@ -45,6 +56,8 @@ class GraphWidget(View):
         self.setRainModule(rain_module)
         self.setRainMax(rain_max)
         self.setRainSteps(rain_steps)
+        self.setVectorized(vectorized)
+        self.setNightShading(night_shading)
 
     def setDensity(self, density: int) -> Self:
         self.density = density
@@ -102,6 +115,15 @@ class GraphWidget(View):
         self.rain_steps = rain_steps
         return self
     
+    def setVectorized(self, vectorized: bool) -> Self:
+        # only used if numpy is installed
+        self.vectorized = vectorized
+        return self
+
+    def setNightShading(self, night_shading: bool) -> Self:
+        self.night_shading = night_shading
+        return self
+
     def roundTimestampToHalfHours(self, timestamp: datetime) -> datetime:
         if timestamp.minute < 15:
             return timestamp.replace(second = 0, microsecond = 0, minute = 0)
@@ -110,30 +132,203 @@ class GraphWidget(View):
         else:
             return timestamp.replace(second = 0, microsecond = 0, minute = 0) + timedelta(hours = 1)
         
-    def findNearestDataPoint(self, data: list[DataPoint], time: datetime) -> DataPoint:
+    def findNearestDataPoint(self, data: list[DataPoint], time: datetime, timestamps: list[datetime] = None) -> DataPoint:
+        # data is sorted by time, pass its timestamps (datetimes or seconds like time) when looking up many values
+        if timestamps == None:
+            timestamps = [dp.timestamp for dp in data]
+        i = bisect.bisect_left(timestamps, time)
+        if i == len(data):
+            return None
+        if i == 0 or timestamps[i] == time:
+            return data[i]
+        if time - timestamps[i - 1] <= timestamps[i] - time:
+            return data[i - 1]
+        return data[i]
+
+    def calculateGraphArea(self) -> tuple[float, float]:
+        metrics = TextMetrics()
+        indicator_text_length = max(metrics.textLength(str(self.temp_min) + u'\N{DEGREE SIGN}', self.temp_size), metrics.textLength(str(self.temp_max)  + u'\N{DEGREE SIGN}', self.temp_size))
+        x_start = self.padding_horizontal + indicator_text_length + self.indicator_size
+        graph_width = self.width - 2 * self.padding_horizontal - indicator_text_length - self.indicator_size - self.current_value_radius
+        return x_start, graph_width
+
+    def measureRequests(self) -> dict:
+        # The time range shown depends on the width, so this needs a laid out graph
+        x_start, graph_width = self.calculateGraphArea()
+        hours_visible = math.ceil(graph_width / (self.density * 2))
+        days_visible = math.ceil(hours_visible / 24)
+        requests = {}
+        requests['temperature'] = dict(device_id = self.main_module['_id'], scale = '30min', mtype = 'Temperature', module_id = self.temperature_module['_id'], date_begin = self.now - hours_visible * 3600, date_end = self.now, optimize = True)
+        if self.show_days:
+            requests['minmax'] = dict(device_id = self.main_module['_id'], scale = '1day', mtype = 'min_temp,max_temp', module_id = self.temperature_module['_id'], date_begin = self.now - days_visible * 24 * 3600, date_end = self.now, optimize = True)
+        if self.rain_module:
+            requests['rain'] = dict(device_id = self.main_module["_id"], scale = '1hour', mtype = 'sum_rain', module_id = self.rain_module["_id"], date_begin = self.now - hours_visible * 3600, date_end = self.now, optimize = True)
+        return requests
+
+    def collectMeasures(self, fetcher) -> Self:
+        for request in self.measureRequests().values():
+            fetcher.request(**request)
+        return self
+
+    def drawSeries(self, draw: ImageDraw, data: list[DataPoint], x_start: float, graph_width: float, y_zero: int, temp_resolution: float, rain_resolution: float):
         for i in range(len(data)):
-            dp1 = data[i]
-            dp2 = data[i + 1] if i < len(data) - 1 else None
-            if dp1.timestamp > time:
-                return dp1
-                break
-            elif dp1.timestamp == time:
-                return dp1
-            elif dp1.timestamp < time and dp2 and dp2.timestamp > time:
-                if time - dp1.timestamp <= dp2.timestamp - time:
-                    return dp1
-                else:
-                    return dp2
+            dp = data[i]
+            # Draw y axis at midnight
+            if dp.is_midnight:
+                draw.line((dp.x_position, self.padding_vertical, dp.x_position, self.height - self.padding_vertical - (self.day_height if self.show_days else 0)), fill = 0) # y axis
+                temp_indicator = self.temp_steps
+                while temp_indicator <= self.temp_max:
+                    y_position = y_zero - (temp_resolution * temp_indicator)
+                    draw.line((dp.x_position - self.indicator_size, y_position, dp.x_position, y_position), fill = 0)
+                    temp_indicator = temp_indicator + self.temp_steps
+                temp_indicator = -self.temp_steps
+                while temp_indicator >= self.temp_min:
+                    y_position = y_zero - (temp_resolution * temp_indicator)
+                    draw.line((dp.x_position - self.indicator_size, y_position, dp.x_position, y_position), fill = 0)
+                    temp_indicator = temp_indicator - self.temp_steps
+                if self.rain_module:
+                    rain_indicator = self.rain_steps
+                    while rain_indicator <= self.rain_max:
+                        y_position = y_zero - (rain_resolution * rain_indicator)
+                        draw.line((dp.x_position, y_position, dp.x_position + self.indicator_size, y_position), fill = 0)
+                        rain_indicator = rain_indicator + self.rain_steps
+                        
+
+            # Draw hour marker if needed
+            if dp.show_tick:
+                draw.line((dp.x_position, y_zero, dp.x_position, y_zero + self.indicator_size), fill = 0)
+
+            # Draw temp value
+            if dp.temp_value != None and i < len(data) - 1 and data[i + 1].temp_value != None:
+                x1 = dp.x_position
+                y1 = y_zero - max(min(dp.temp_value, self.temp_max), self.temp_min) * temp_resolution
+                x2 = data[i + 1].x_position
+                y2 = y_zero - max(min(data[i + 1].temp_value, self.temp_max), self.temp_min) * temp_resolution
+                draw.line((x1, y1, x2, y2), fill = 0, width = self.line_width)
+
+            # Draw current value dot if latest value
+            if dp.is_latest and dp.temp_value:
+                x1 = dp.x_position - self.current_value_radius
+                y1 = y_zero - max(min(data[i].temp_value, self.temp_max), self.temp_min) * temp_resolution - self.current_value_radius
+                x2 = dp.x_position + self.current_value_radius
+                y2 = y_zero - max(min(data[i].temp_value, self.temp_max), self.temp_min) * temp_resolution + self.current_value_radius
+                draw.ellipse((x1, y1, x2, y2), fill = 0)
+
+            # Draw rain if needed
+            if dp.rain_value and dp.rain_value > 0.0:
+                x1 = max(dp.x_position - self.density, x_start)
+                y1 = y_zero - (min(dp.rain_value, self.rain_max) * rain_resolution)
+                x2 = min(dp.x_position + self.density, x_start + graph_width)
+                y2 = y_zero
+                draw.rectangle((x1, y1, x2, y2), fill = 0)
+
+    def drawSeriesVectorized(self, draw: ImageDraw, data: list[DataPoint], x_start: float, graph_width: float, y_zero: int, temp_resolution: float, rain_resolution: float):
+        # Same output as drawSeries, with the per slot work done on whole arrays
+        axis_bottom = self.height - self.padding_vertical - (self.day_height if self.show_days else 0)
+        temp_ticks = [y_zero - (temp_resolution * t) for t in range(self.temp_steps, self.temp_max + 1, self.temp_steps)]
+        temp_ticks += [y_zero - (temp_resolution * t) for t in range(-self.temp_steps, self.temp_min - 1, -self.temp_steps)]
+        rain_ticks = [y_zero - (rain_resolution * r) for r in range(self.rain_steps, self.rain_max + 1, self.rain_steps)] if self.rain_module else []
+        for dp in data:
+            # Draw y axis at midnight
+            if dp.is_midnight:
+                draw.line((dp.x_position, self.padding_vertical, dp.x_position, axis_bottom), fill = 0)
+                for y_position in temp_ticks:
+                    draw.line((dp.x_position - self.indicator_size, y_position, dp.x_position, y_position), fill = 0)
+                for y_position in rain_ticks:
+                    draw.line((dp.x_position, y_position, dp.x_position + self.indicator_size, y_position), fill = 0)
+            # Draw hour marker if needed
+            if dp.show_tick:
+                draw.line((dp.x_position, y_zero, dp.x_position, y_zero + self.indicator_size), fill = 0)
+
+        x = numpy.array([dp.x_position for dp in data], dtype = float)
+        temp = numpy.array([numpy.nan if dp.temp_value == None else dp.temp_value for dp in data], dtype = float)
+        rain = numpy.array([dp.rain_value if dp.rain_value else 0.0 for dp in data], dtype = float)
+
+        # Draw temp values as one polyline per run of consecutive values
+        y = y_zero - numpy.clip(temp, self.temp_min, self.temp_max) * temp_resolution
+        edges = numpy.flatnonzero(numpy.diff(numpy.concatenate(([0], ~numpy.isnan(temp), [0])).astype(numpy.int8)))
+        for run_start, run_end in zip(edges[::2], edges[1::2]):
+            if run_end - run_start > 1:
+                draw.line(list(zip(x[run_start:run_end].tolist(), y[run_start:run_end].tolist())), fill = 0, width = self.line_width)
+
+        # Draw current value dot
+        for i in range(len(data)):
+            dp = data[i]
+            if dp.is_latest and dp.temp_value:
+                x1 = dp.x_position - self.current_value_radius
+                y1 = y[i] - self.current_value_radius
+                x2 = dp.x_position + self.current_value_radius
+                y2 = y[i] + self.current_value_radius
+                draw.ellipse((x1, y1, x2, y2), fill = 0)
+
+        # Fill rain bars through a mask of the columns they cover
+        bars = rain > 0.0
+        if bars.any():
+            left = numpy.maximum(x[bars] - self.density, x_start).astype(int)
+            right = numpy.minimum(x[bars] + self.density, x_start + graph_width).astype(int)
+            top = (y_zero - numpy.minimum(rain[bars], self.rain_max) * rain_resolution).astype(int)
+            x_offset = left.min()
+            y_offset = top.min()
+            columns = left[:, None] + numpy.arange(2 * self.density + 1)[None, :]
+            covered = columns <= right[:, None]
+            column_top = numpy.full(right.max() - x_offset + 1, y_zero + 1)
+            numpy.minimum.at(column_top, columns[covered] - x_offset, numpy.broadcast_to(top[:, None], columns.shape)[covered])
+            rows = numpy.arange(y_offset, y_zero + 1)[:, None]
+            mask = (rows >= column_top[None, :]).astype(numpy.uint8) * 255
+            self.image.paste(0, (int(x_offset), int(y_offset)), Image.fromarray(mask, 'L'))
+
+    def nightPattern(self, width: int, height: int) -> Image:
+        # Dots every 4 pixels, they stay the same on the 1-bit display instead of being dithered
+        pattern = GraphWidget.night_patterns.get((width, height))
+        if pattern == None:
+            dots = bytes(255 if x % 4 == 0 else 0 for x in range(width))
+            empty = bytes(width)
+            pattern = Image.frombytes('L', (width, height), b''.join(dots if y % 4 == 0 else empty for y in range(height)))
+            GraphWidget.night_patterns[(width, height)] = pattern
+        return pattern
+
+    def drawNightShading(self, data: list[DataPoint], x_start: float, graph_width: float):
+        # The sun times come from the ephemeris table, one lookup per day shown
+        longitude, latitude = self.main_module['place']['location']
+        ephemeris = SunEphemeris()
+        days = {}
+        runs = []
+        for dp in data:
+            day = dp.timestamp.date()
+            if day not in days:
+                days[day] = ephemeris.sunTimes(latitude, longitude, day)
+            rise, set = days[day]
+            timestamp = dp.timestamp.timestamp()
+            # without sunrise or sunset the day isn't shaded
+            night = rise != None and set != None and (timestamp < rise or timestamp >= set)
+            if not night:
+                continue
+            if runs and runs[-1][1] == dp.x_position - self.density:
+                runs[-1][1] = dp.x_position
+            else:
+                runs.append([dp.x_position, dp.x_position])
+
+        top = self.padding_vertical
+        bottom = self.height - self.padding_vertical - (self.day_height if self.show_days else 0)
+        pattern = self.nightPattern(self.width, self.height)
+        for first, last in runs:
+            box = (max(round(first - self.density / 2), math.ceil(x_start)), top, min(round(last + self.density / 2), math.floor(x_start + graph_width)), bottom)
+            if box[2] > box[0]:
+                self.image.paste((0, 0, 0, 255), box, pattern.crop(box))
+
+    def fingerprint(self) -> tuple:
+        # the graph fetches its data while rendering
         return None
 
     def render(self) -> Image:
         config = ConfigHelper()
-        fontdir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'Font.ttc')
-        indicator_font = ImageFont.truetype(fontdir, self.temp_size)
-        day_font = ImageFont.truetype(fontdir, self.day_height)
+        indicator_font = FontCache().getFont(self.temp_size)
+        day_font = FontCache().getFont(self.day_height)
+        metrics = TextMetrics()
         self.image = Image.new('RGBA', (self.width, self.height), (255, 255, 255, 0))
         draw = ImageDraw.Draw(self.image)
-        now = datetime.now(timezone.utc).timestamp()
+        now = self.now
+        requests = self.measureRequests()
         
         # Prepare height variables
         graph_height = self.height - 2 * self.padding_vertical - 2 * self.temp_size - (self.day_height if self.show_days else 0)
@@ -143,13 +338,7 @@ class GraphWidget(View):
         y_zero = math.ceil(self.padding_vertical + self.temp_size + temp_resolution * self.temp_max)
 
         # Prepare width variables
-        indicator_text_length = max(draw.textlength(str(self.temp_min) + u'\N{DEGREE SIGN}', indicator_font), draw.textlength(str(self.temp_max)  + u'\N{DEGREE SIGN}', indicator_font))
-        x_start = self.padding_horizontal + indicator_text_length + self.indicator_size
-        graph_width = self.width - 2 * self.padding_horizontal - indicator_text_length - self.indicator_size - self.current_value_radius
-        
-        # Calculate time range
-        hours_visible = math.ceil(graph_width / (self.density * 2))
-        days_visible = math.ceil(hours_visible / 24)
+        x_start, graph_width = self.calculateGraphArea()
 
         # Prepare data
         data: list[DataPoint] = []
@@ -171,23 +360,16 @@ class GraphWidget(View):
             i = i + 1
         data[-1].day_text = dp.timestamp.strftime('%a') 
         data.reverse()
+        # measure times are compared as seconds, so no datetime is made per value
+        timestamps = [dp.timestamp.timestamp() for dp in data]
 
         # Get temperature data
-        date_begin = now - hours_visible * 3600
         try:
-            temp_measures = self.netatmo_client.getMeasure(self.main_module['_id'], '30min', 'Temperature', self.temperature_module['_id'], date_begin = date_begin, date_end = now, optimize = True)
-
-            if temp_measures:
-                for chunk in temp_measures['body']:
-                    begin_time = chunk['beg_time']
-                    step_time = chunk['step_time']
-                    values = chunk['value']
-                    for i in range(len(values)):
-                        time = datetime.fromtimestamp(begin_time + i * step_time)
-                        value = values[i][0]
-                        dp = self.findNearestDataPoint(data, time)
-                        if dp:
-                            dp.temp_value = value
+            temp_series = MeasureSeries.decode(self.netatmo_client.getMeasure(**requests['temperature']))
+            for time, value in temp_series.items():
+                dp = self.findNearestDataPoint(data, time, timestamps)
+                if dp:
+                    dp.temp_value = value
         except:
             logging.warning('Fetching temperature data for graph failed!')
 
@@ -196,55 +378,41 @@ class GraphWidget(View):
 
         # Get daily temperature max min values for day display if needed
         if self.show_days:
-            date_begin  = now - days_visible * 24 * 3600
             try:
-                minmax_measures = self.netatmo_client.getMeasure(self.main_module['_id'], '1day', 'min_temp,max_temp', self.temperature_module['_id'], date_begin = date_begin, date_end = now, optimize = True)
-                
-                if minmax_measures:
-                    for chunk in minmax_measures['body']:
-                        begin_time = chunk['beg_time']
-                        step_time = chunk['step_time']
-                        values = chunk['value']
-                        for i in range(len(values)):
-                            time = datetime.fromtimestamp(begin_time + i * step_time).replace(hour = 0)
-                            dp = self.findNearestDataPoint(data, time)
-                            value = values[i]
-                            if dp:
-                                dp.day_values = value
+                minmax_series = MeasureSeries.decode(self.netatmo_client.getMeasure(**requests['minmax']))
+                for i in range(len(minmax_series)):
+                    time = datetime.fromtimestamp(minmax_series.timestamps[i]).replace(hour = 0).timestamp()
+                    dp = self.findNearestDataPoint(data, time, timestamps)
+                    if dp:
+                        dp.day_values = minmax_series.row(i)
             except:
                 logging.warning('Fetching daily temperature min and max values for graph failed!')
 
 
         # Get hourly rain data if needed
         if self.rain_module:
-            date_begin  = now - hours_visible * 3600
             try:
-                rain_measures = self.netatmo_client.getMeasure(self.main_module["_id"], '1hour', 'sum_rain', self.rain_module["_id"], date_begin = date_begin, date_end = now, optimize = True)
-
-                if rain_measures and rain_measures['body']:
-                    for chunk in rain_measures['body']:
-                        begin_time = chunk['beg_time']
-                        step_time = chunk['step_time']
-                        values = chunk['value']
-                        for i in range(len(values)):
-                            time = datetime.fromtimestamp(begin_time + i * step_time)
-                            value = values[i][0]
-                            dp = self.findNearestDataPoint(data, time)
-                            if dp:
-                                dp.rain_value = value
+                rain_series = MeasureSeries.decode(self.netatmo_client.getMeasure(**requests['rain']))
+                for time, value in rain_series.items():
+                    dp = self.findNearestDataPoint(data, time, timestamps)
+                    if dp:
+                        dp.rain_value = value
             except:
                 logging.warning('Fetching rain data for graph failed!')
 
+        if self.night_shading:
+            self.drawNightShading(data, x_start, graph_width)
+
         # Draw y axis
         draw.line((x_start, self.padding_vertical, x_start, self.height - self.padding_vertical - (self.day_height if self.show_days else 0)), fill = 0) # y axis
         text = str(0) + u'\N{DEGREE SIGN}'
-        l, t, r, b = draw.textbbox((0,0), text, indicator_font)
+        l, t, r, b = metrics.textBBox(text, self.temp_size)
         draw.text((x_start - self.indicator_size - r, y_zero - (b / 2)), text, font = indicator_font, fill = 0)
         temp_indicator = self.temp_steps
         while temp_indicator <= self.temp_max:
             y_position = y_zero - (temp_resolution * temp_indicator)
             text = str(temp_indicator) + u'\N{DEGREE SIGN}'
-            l, t, r, b = draw.textbbox((0,0), text, indicator_font)
+            l, t, r, b = metrics.textBBox(text, self.temp_size)
             draw.text((x_start - self.indicator_size - r, y_position - (b / 2) - 1), text, font = indicator_font, fill = 0)
             draw.line((x_start - self.indicator_size, y_position, x_start, y_position), fill = 0)
             temp_indicator = temp_indicator + self.temp_steps
@@ -252,7 +420,7 @@ class GraphWidget(View):
         while temp_indicator >= self.temp_min:
             y_position = y_zero - (temp_resolution * temp_indicator)
             text = str(temp_indicator) + u'\N{DEGREE SIGN}'
-            l, t, r, b = draw.textbbox((0,0), text, indicator_font)
+            l, t, r, b = metrics.textBBox(text, self.temp_size)
             draw.text((x_start - self.indicator_size - r, y_position - (b / 2 + 1)), text, font = indicator_font, fill = 0)
             draw.line((x_start - self.indicator_size, y_position, x_start, y_position), fill = 0)
             temp_indicator = temp_indicator - self.temp_steps
@@ -262,7 +430,7 @@ class GraphWidget(View):
                 y_position = y_zero - (rain_resolution * rain_indicator)
                 if rain_indicator + self.rain_steps > self.rain_max:
                     text = str(rain_indicator) + 'mm'
-                    l, t, r, b = draw.textbbox((0,0), text, indicator_font)
+                    l, t, r, b = metrics.textBBox(text, self.temp_size)
                     draw.text((x_start + self.indicator_size, y_position - (b / 2) - 1), text, font = indicator_font, fill = 0)
                 draw.line((x_start, y_position, x_start + self.indicator_size, y_position), fill = 0)
                 rain_indicator = rain_indicator + self.rain_steps
@@ -270,57 +438,13 @@ class GraphWidget(View):
         # Draw x axis
         draw.line((x_start, y_zero, self.width - self.padding_horizontal, y_zero), fill = 0) # x axis
 
+        if self.vectorized and numpy is not None:
+            self.drawSeriesVectorized(draw, data, x_start, graph_width, y_zero, temp_resolution, rain_resolution)
+        else:
+            self.drawSeries(draw, data, x_start, graph_width, y_zero, temp_resolution, rain_resolution)
+
         for i in range(len(data)):
             dp = data[i]
-            # Draw y axis at midnight
-            if dp.is_midnight:
-                draw.line((dp.x_position, self.padding_vertical, dp.x_position, self.height - self.padding_vertical - (self.day_height if self.show_days else 0)), fill = 0) # y axis
-                temp_indicator = self.temp_steps
-                while temp_indicator <= self.temp_max:
-                    y_position = y_zero - (temp_resolution * temp_indicator)
-                    draw.line((dp.x_position - self.indicator_size, y_position, dp.x_position, y_position), fill = 0)
-                    temp_indicator = temp_indicator + self.temp_steps
-                temp_indicator = -self.temp_steps
-                while temp_indicator >= self.temp_min:
-                    y_position = y_zero - (temp_resolution * temp_indicator)
-                    draw.line((dp.x_position - self.indicator_size, y_position, dp.x_position, y_position), fill = 0)
-                    temp_indicator = temp_indicator - self.temp_steps
-                if self.rain_module:
-                    rain_indicator = self.rain_steps
-                    while rain_indicator <= self.rain_max:
-                        y_position = y_zero - (rain_resolution * rain_indicator)
-                        draw.line((dp.x_position, y_position, dp.x_position + self.indicator_size, y_position), fill = 0)
-                        rain_indicator = rain_indicator + self.rain_steps
-                        
-
-            # Draw hour marker if needed
-            if dp.show_tick:
-                draw.line((dp.x_position, y_zero, dp.x_position, y_zero + self.indicator_size), fill = 0)
-
-            # Draw temp value
-            if dp.temp_value != None and i < len(data) - 1 and data[i + 1].temp_value != None:
-                x1 = dp.x_position
-                y1 = y_zero - max(min(dp.temp_value, self.temp_max), self.temp_min) * temp_resolution
-                x2 = data[i + 1].x_position
-                y2 = y_zero - max(min(data[i + 1].temp_value, self.temp_max), self.temp_min) * temp_resolution
-                draw.line((x1, y1, x2, y2), fill = 0, width = self.line_width)
-
-            # Draw current value dot if latest value
-            if dp.is_latest and dp.temp_value:
-                x1 = dp.x_position - self.current_value_radius
-                y1 = y_zero - max(min(data[i].temp_value, self.temp_max), self.temp_min) * temp_resolution - self.current_value_radius
-                x2 = dp.x_position + self.current_value_radius
-                y2 = y_zero - max(min(data[i].temp_value, self.temp_max), self.temp_min) * temp_resolution + self.current_value_radius
-                draw.ellipse((x1, y1, x2, y2), fill = 0)
-
-            # Draw rain if needed
-            if dp.rain_value and dp.rain_value > 0.0:
-                x1 = max(dp.x_position - self.density, x_start)
-                y1 = y_zero - (min(dp.rain_value, self.rain_max) * rain_resolution)
-                x2 = min(dp.x_position + self.density, x_start + graph_width)
-                y2 = y_zero
-                draw.rectangle((x1, y1, x2, y2), fill = 0)
-
             # Draw day text if needed
             if dp.day_text and self.show_days:
                 next_day = data[-1]
@@ -336,9 +460,9 @@ class GraphWidget(View):
                     value_text = '(' + config.format_decimal(dp.day_values[0]) + u'\N{DEGREE SIGN}' + '/' + config.format_decimal(dp.day_values[1]) + u'\N{DEGREE SIGN}' + ')'
                     full_text = full_text + ' ' + value_text
                 
-                length = draw.textlength(full_text, day_font)
-                short_length = draw.textlength(short_text, day_font)
-                l, t, r, b = draw.textbbox((0,0), full_text, day_font)
+                length = metrics.textLength(full_text, self.day_height)
+                short_length = metrics.textLength(short_text, self.day_height)
+                l, t, r, b = metrics.textBBox(full_text, self.day_height)
                 if length <= available_space:
                     offset = math.floor((available_space - length) / 2)
                     y_position = self.height - self.padding_vertical - b
@@ -348,8 +472,5 @@ class GraphWidget(View):
                     y_position = self.height - self.padding_vertical - b
                     draw.text((dp.x_position + offset, y_position), short_text, font = day_font, fill = 0)
 
-        del indicator_font
-        del day_font
-        
         super().render()
         return self.image
\ No newline at end of file
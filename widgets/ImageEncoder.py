@@ -0,0 +1,30 @@
+from .ConfigHelper import ConfigHelper
+from PIL import Image, features
+from io import BytesIO
+
+class ImageEncoder(object):
+    # Encodes screens in the formats they are exported and served in
+    extensions = {'png': 'png', 'raw': 'raw', 'webp': 'webp'}
+    content_types = {'png': 'image/png', 'raw': 'application/octet-stream', 'webp': 'image/webp'}
+
+    def __init__(self, png_compress_level: int = None):
+        self.png_compress_level = png_compress_level if png_compress_level != None else ConfigHelper().export_png_compress_level
+
+    @staticmethod
+    def available(format: str) -> bool:
+        # WebP depends on how Pillow was built
+        return format in ImageEncoder.extensions and (format != 'webp' or features.check('webp'))
+
+    def write(self, image: Image, format: str, file):
+        if format == 'raw':
+            # rows of packed bits as the displays take them, most significant bit first, 1 is white
+            file.write(image.convert('1').tobytes())
+        elif format == 'webp':
+            image.save(file, 'WEBP', lossless = True, method = 0)
+        else:
+            image.save(file, 'PNG', compress_level = self.png_compress_level)
+
+    def encode(self, image: Image, format: str) -> bytes:
+        file = BytesIO()
+        self.write(image, format, file)
+        return file.getvalue()
@@ -0,0 +1,95 @@
+from .ConfigHelper import Singleton, ConfigHelper
+from .ImageEncoder import ImageEncoder
+from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import logging
+import os
+import re
+import shutil
+
+class ImageExporter(metaclass=Singleton):
+    # File extension per format
+    extensions = ImageEncoder.extensions
+
+    def __init__(self, directory: str = None, formats: list[str] = None, png_compress_level: int = None, keep_count: int = None, keep_bytes: int = None):
+        config = ConfigHelper()
+        self.directory = directory if directory else config.export_directory
+        self.formats = formats if formats else config.export_formats
+        self.encoder = ImageEncoder(png_compress_level)
+        self.keep_count = keep_count if keep_count != None else config.export_keep_count
+        self.keep_bytes = keep_bytes if keep_bytes != None else config.export_keep_bytes
+        for format in self.formats:
+            if format not in self.extensions:
+                raise ValueError('Unknown export format %s' % format)
+        if 'webp' in self.formats and not ImageEncoder.available('webp'):
+            logging.warning('Pillow has no WebP support, exporting PNG instead')
+            self.formats = [format for format in self.formats if format != 'webp'] + (['png'] if 'png' not in self.formats else [])
+        # one thread, so files are written and cleaned up in the order of the renders
+        self.executor = ThreadPoolExecutor(max_workers = 1)
+
+    def export(self, image: Image, prefix: str = ''):
+        # The image is copied, the screen draws the next render into the same one
+        timestamp = str(datetime.now(timezone.utc).timestamp())
+        future = self.executor.submit(self.writeAll, image.copy(), prefix, timestamp)
+        future.add_done_callback(self.logFailure)
+        return future
+
+    def logFailure(self, future):
+        if future.exception():
+            logging.warning('Exporting image failed: %s', future.exception())
+
+    def write(self, image: Image, format: str, file):
+        self.encoder.write(image, format, file)
+
+    def writeAll(self, image: Image, prefix: str, timestamp: str):
+        os.makedirs(self.directory, exist_ok = True)
+        for format in self.formats:
+            extension = self.extensions[format]
+            name = prefix + timestamp + '.' + extension
+            path = os.path.join(self.directory, name)
+            # readers never see half written files
+            with open(path + '.tmp', 'wb') as file:
+                self.write(image, format, file)
+            os.replace(path + '.tmp', path)
+            self.link(name, os.path.join(self.directory, prefix + 'latest.' + extension))
+            self.applyRetention(prefix, extension)
+
+    def link(self, name: str, latest: str):
+        # replaced in one step, so the link always points to a complete image
+        try:
+            os.symlink(name, latest + '.tmp')
+        except FileExistsError:
+            os.remove(latest + '.tmp')
+            os.symlink(name, latest + '.tmp')
+        except OSError:
+            shutil.copyfile(os.path.join(self.directory, name), latest + '.tmp')
+        os.replace(latest + '.tmp', latest)
+
+    def exportedFiles(self, prefix: str, extension: str) -> list[tuple]:
+        # Only files named like the exported ones are touched, oldest first
+        pattern = re.compile(re.escape(prefix) + r'(\d+(\.\d+)?)\.' + re.escape(extension) + '$')
+        files = []
+        for entry in os.scandir(self.directory):
+            match = pattern.match(entry.name)
+            if match and entry.is_file(follow_symlinks = False):
+                files.append((float(match.group(1)), entry.path, entry.stat().st_size))
+        return sorted(files)
+
+    def applyRetention(self, prefix: str, extension: str):
+        if not self.keep_count and not self.keep_bytes:
+            return
+        files = self.exportedFiles(prefix, extension)
+        total = sum(file[2] for file in files)
+        # the newest file is always kept
+        while len(files) > 1 and ((self.keep_count and len(files) > self.keep_count) or (self.keep_bytes and total > self.keep_bytes)):
+            timestamp, path, size = files.pop(0)
+            os.remove(path)
+            total -= size
+
+    def flush(self):
+        # Waits for the files queued so far
+        self.executor.submit(lambda: None).result()
+
+    def close(self):
+        self.executor.shutdown(wait = True)
@@ -10,6 +10,7 @@ class ImageWidget(View):
         super().__init__()
         self.setImage(image = image)
         self.setRotation(rotation)
+        self.key = None
     
     def setImage(self, image: Image) -> Self:
         self.image = image
@@ -19,6 +20,16 @@ class ImageWidget(View):
         self.rotation = rotation
         return self
 
+    def setKey(self, key: tuple) -> Self:
+        # Describes the image, so it can be taken from the render cache
+        self.key = key
+        return self
+
+    def fingerprint(self) -> tuple:
+        if self.key == None:
+            return None
+        return super().fingerprint() + (self.rotation, self.key)
+
     def render(self) -> Image:
         self.image = self.image.convert("RGBA")
         resized_image = Image.new("RGBA", self.image.size, (255, 255, 255))
@@ -0,0 +1,60 @@
+from .ConfigHelper import Singleton
+from collections import OrderedDict
+
+class LayoutPlan(metaclass=Singleton):
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self.plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple):
+        plan = self.plans.get(key)
+        if plan == None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.plans.move_to_end(key)
+        return plan
+
+    def put(self, key: tuple, plan):
+        self.plans[key] = plan
+        self.plans.move_to_end(key)
+        if len(self.plans) > self.max_size:
+            self.plans.popitem(last = False)
+        return plan
+
+    def shapeKey(self, view) -> tuple:
+        # The geometry the tree was built with, before any size got distributed
+        return (view.layoutKey(), tuple(self.shapeKey(child) for child in view.children()))
+
+    def nodes(self, view) -> list:
+        nodes = [view]
+        for node in nodes:
+            nodes.extend(node.children())
+        return nodes
+
+    def apply(self, root):
+        # Size all views of the tree, from the plan of an earlier tree of the same shape if there is one
+        key = ('tree', self.shapeKey(root))
+        nodes = self.nodes(root)
+        sizes = self.get(key)
+        if sizes:
+            for view, (width, height) in zip(nodes, sizes):
+                view.setSize(width = width, height = height)
+        else:
+            # parents come before their children, so each one distributes its final size
+            for view in nodes:
+                view.prepareChild()
+            self.put(key, [(view.width, view.height) for view in nodes])
+        for view in nodes:
+            view.laid_out = True
+        return root
+
+    def resetStatistics(self):
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.plans.clear()
+        self.resetStatistics()
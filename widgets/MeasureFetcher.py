@@ -0,0 +1,66 @@
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self
+from .ConfigHelper import ConfigHelper
+from .MeasureStore import MeasureStore
+from .MeasurePlanner import MeasurePlanner
+from concurrent.futures import ThreadPoolExecutor
+from lnetatmo import WeatherStationData
+import logging
+import time
+
+class MeasureFetcher(object):
+    def __init__(self, netatmo_client: WeatherStationData, max_workers: int = None, store: MeasureStore = None, coalesce: bool = None):
+        config = ConfigHelper()
+        self.netatmo_client = netatmo_client
+        self.store = store
+        self.max_workers = max_workers if max_workers else config.fetch_concurrency
+        self.planner = MeasurePlanner() if (coalesce if coalesce != None else config.coalesce_measures) else None
+        self.pending = {}
+        self.results = {}
+        self.errors = {}
+
+    def requestKey(self, device_id, scale, mtype, module_id = None, date_begin = None, date_end = None, limit = None, optimize = False, real_time = False) -> tuple:
+        return (device_id, scale, mtype, module_id, date_begin, date_end, limit, optimize, real_time)
+
+    def request(self, **request) -> Self:
+        # Requests take the keyword arguments of WeatherStationData.getMeasure
+        key = self.requestKey(**request)
+        if key not in self.results and key not in self.errors:
+            self.pending[key] = request
+        return self
+
+    def fetchMeasure(self, **request):
+        if self.store:
+            return self.store.getMeasure(self.netatmo_client, **request)
+        return self.netatmo_client.getMeasure(**request)
+
+    def fetch(self) -> Self:
+        if not self.pending:
+            return self
+        requests = list(self.pending.items())
+        self.pending = {}
+        start = time.time()
+        # requests for overlapping ranges of a module are sent as one
+        calls = self.planner.plan(requests) if self.planner else [(request, [(key, request)]) for key, request in requests]
+        with ThreadPoolExecutor(max_workers = min(self.max_workers, len(calls))) as executor:
+            futures = [(call, members, executor.submit(self.fetchMeasure, **call)) for call, members in calls]
+            for call, members, future in futures:
+                for key, request in members:
+                    try:
+                        self.results[key] = self.planner.cut(future.result(), call, request) if self.planner else future.result()
+                    except Exception as e:
+                        # raised again for the widget that asks for it, which handles it as before
+                        self.errors[key] = e
+        logging.debug('Fetched %s measures with %s requests in %.2fs', len(requests), len(calls), time.time() - start)
+        return self
+
+    def getMeasure(self, device_id, scale, mtype, module_id = None, date_begin = None, date_end = None, limit = None, optimize = False, real_time = False):
+        key = self.requestKey(device_id, scale, mtype, module_id, date_begin, date_end, limit, optimize, real_time)
+        if key in self.errors:
+            raise self.errors[key]
+        if key in self.results:
+            return self.results[key]
+        logging.debug('Measure %s was not prefetched', key)
+        return self.fetchMeasure(device_id = device_id, scale = scale, mtype = mtype, module_id = module_id, date_begin = date_begin, date_end = date_end, limit = limit, optimize = optimize, real_time = real_time)
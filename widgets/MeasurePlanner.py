@@ -0,0 +1,82 @@
+import math
+
+class MeasurePlanner(object):
+    # Merges getMeasure requests of the same device, module and scale whose time ranges overlap into one,
+    # asking for all their types, and cuts the response back to what every request asked for.
+    # Only optimized requests over a fixed time range without a limit are merged.
+    scale_seconds = {'30min': 1800, '1hour': 3600, '3hours': 10800, '1day': 86400, '1week': 604800}
+    # Netatmo returns at most this many points per request
+    max_points = 1024
+
+    def mergeable(self, request: dict) -> bool:
+        return bool(request.get('optimize')) and not request.get('limit') and request.get('date_begin') != None and request.get('date_end') != None and request.get('scale') in self.scale_seconds
+
+    def groupKey(self, request: dict) -> tuple:
+        return (request['device_id'], request.get('module_id'), request['scale'], bool(request.get('real_time')))
+
+    def plan(self, requests: list[tuple]) -> list[tuple]:
+        # (request, [(key, request), ...]) per call to send, the request is the merged one
+        calls = []
+        groups = {}
+        for key, request in requests:
+            if self.mergeable(request):
+                groups.setdefault(self.groupKey(request), []).append((key, request))
+            else:
+                calls.append((request, [(key, request)]))
+        for members in groups.values():
+            step = self.scale_seconds[members[0][1]['scale']]
+            members.sort(key = lambda member: member[1]['date_begin'])
+            cluster = [members[0]]
+            begin, end = members[0][1]['date_begin'], members[0][1]['date_end']
+            for member in members[1:]:
+                request = member[1]
+                merged_end = max(end, request['date_end'])
+                if request['date_begin'] <= end + step and (merged_end - begin) / step < self.max_points:
+                    cluster.append(member)
+                    end = merged_end
+                else:
+                    calls.append(self.merge(cluster, begin, end))
+                    cluster = [member]
+                    begin, end = request['date_begin'], request['date_end']
+            calls.append(self.merge(cluster, begin, end))
+        return calls
+
+    def merge(self, cluster: list[tuple], begin: float, end: float) -> tuple:
+        if len(cluster) == 1:
+            return (cluster[0][1], cluster)
+        types = []
+        for key, request in cluster:
+            for mtype in request['mtype'].split(','):
+                if mtype not in types:
+                    types.append(mtype)
+        merged = dict(cluster[0][1], mtype = ','.join(types), date_begin = begin, date_end = end)
+        return (merged, cluster)
+
+    def cut(self, measure: dict, merged: dict, request: dict) -> dict:
+        # The part of the merged response one request asked for, in the order of its types
+        if merged is request or not measure or not isinstance(measure.get('body'), list):
+            return measure
+        types = merged['mtype'].split(',')
+        columns = [types.index(mtype) for mtype in request['mtype'].split(',')]
+        same_columns = columns == list(range(len(types)))
+        begin, end = request['date_begin'], request['date_end']
+        body = []
+        for chunk in measure['body']:
+            step = chunk.get('step_time', 0)
+            values = chunk['value']
+            if step:
+                first = max(0, math.ceil((begin - chunk['beg_time']) / step))
+                last = min(len(values), math.floor((end - chunk['beg_time']) / step) + 1)
+            else:
+                first, last = (0, len(values)) if begin <= chunk['beg_time'] <= end else (0, 0)
+            if first >= last:
+                continue
+            values = values[first:last]
+            if not same_columns:
+                values = [[value[column] for column in columns] for value in values]
+            cut = dict(chunk, beg_time = chunk['beg_time'] + first * step, value = values)
+            if len(values) == 1:
+                # like the API answers a single point
+                cut.pop('step_time', None)
+            body.append(cut)
+        return dict(measure, body = body)
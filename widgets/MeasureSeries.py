@@ -0,0 +1,59 @@
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self
+from array import array
+import math
+
+class MeasureSeries(object):
+    # The values of a getMeasure response as flat arrays of floats, one column per measure type.
+    # Missing values are NaN.
+    def __init__(self, types: int = 1):
+        self.timestamps = array('d')
+        self.columns = [array('d') for i in range(types)]
+
+    @classmethod
+    def decode(cls, measure: dict) -> Self:
+        series = None
+        if measure and measure.get('body'):
+            for chunk in measure['body']:
+                if not chunk['value']:
+                    continue
+                if series == None:
+                    series = cls(len(chunk['value'][0]))
+                series.addChunk(chunk)
+        return series if series else cls()
+
+    def addChunk(self, chunk: dict) -> Self:
+        # Optimized responses only send the time of the first value and the step to the next one
+        begin_time = chunk['beg_time']
+        step_time = chunk.get('step_time', 0)
+        values = chunk['value']
+        if type(begin_time) is int and type(step_time) is int and step_time > 0:
+            self.timestamps.extend(array('d', list(range(begin_time, begin_time + len(values) * step_time, step_time))))
+        else:
+            self.timestamps.extend(array('d', [begin_time + i * step_time for i in range(len(values))]))
+        for column, target in enumerate(self.columns):
+            try:
+                target.extend(array('d', [value[column] for value in values]))
+            except (TypeError, IndexError):
+                # null or missing values, rare enough to only be looked for when the fast way fails
+                target.extend([math.nan if len(value) <= column or value[column] == None else value[column] for value in values])
+        return self
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def values(self, column: int = 0) -> array:
+        return self.columns[column]
+
+    def row(self, i: int) -> list:
+        return [self.value(column[i]) for column in self.columns]
+
+    def items(self, column: int = 0):
+        # (timestamp, value) pairs, missing values as None
+        return zip(self.timestamps, map(self.value, self.columns[column]))
+
+    @staticmethod
+    def value(value: float) -> float:
+        return None if math.isnan(value) else value
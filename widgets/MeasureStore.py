@@ -0,0 +1,86 @@
+from lnetatmo import WeatherStationData
+import json
+import logging
+import sqlite3
+import threading
+
+class MeasureStore(object):
+    # Files of an older layout only hold fetched values, so they are started over
+    version = 1
+    key = 'device_id = ? AND module_id = ? AND scale = ? AND type = ? AND real_time = ?'
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path, check_same_thread = False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            if self.connection.execute('PRAGMA user_version').fetchone()[0] != self.version:
+                self.connection.execute('DROP TABLE IF EXISTS measures')
+                self.connection.execute('DROP TABLE IF EXISTS series')
+                self.connection.execute('PRAGMA user_version = %d' % self.version)
+            self.connection.execute('CREATE TABLE IF NOT EXISTS measures (device_id TEXT, module_id TEXT, scale TEXT, type TEXT, real_time INTEGER, time INTEGER, value TEXT, PRIMARY KEY (device_id, module_id, scale, type, real_time, time)) WITHOUT ROWID')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS series (device_id TEXT, module_id TEXT, scale TEXT, type TEXT, real_time INTEGER, covered_begin REAL, covered_end REAL, PRIMARY KEY (device_id, module_id, scale, type, real_time))')
+
+    def coveredRange(self, series: tuple) -> tuple:
+        with self.lock:
+            row = self.connection.execute('SELECT covered_begin, covered_end FROM series WHERE ' + self.key, series).fetchone()
+            last = self.connection.execute('SELECT MAX(time) FROM measures WHERE ' + self.key, series).fetchone()
+        if not row:
+            return None, None, None
+        return row[0], row[1], last[0]
+
+    def store(self, series: tuple, measure: dict, date_begin: float, date_end: float):
+        rows = []
+        for chunk in measure['body']:
+            for i in range(len(chunk['value'])):
+                rows.append(series + (chunk['beg_time'] + i * chunk.get('step_time', 0), json.dumps(chunk['value'][i])))
+        with self.lock, self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO measures VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            # a fetch starting after the covered range leaves a gap, so coverage starts over
+            self.connection.execute('INSERT INTO series VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (device_id, module_id, scale, type, real_time) DO UPDATE SET covered_begin = CASE WHEN excluded.covered_begin > covered_end THEN excluded.covered_begin ELSE MIN(covered_begin, excluded.covered_begin) END, covered_end = MAX(covered_end, excluded.covered_end)', series + (date_begin, date_end))
+
+    def load(self, series: tuple, date_begin: float, date_end: float) -> dict:
+        # Rebuild an optimized getMeasure response, one chunk per run of evenly spaced values
+        with self.lock:
+            rows = self.connection.execute('SELECT time, value FROM measures WHERE ' + self.key + ' AND time >= ? AND time <= ? ORDER BY time', series + (date_begin, date_end)).fetchall()
+        chunks = []
+        chunk = None
+        for time, value in rows:
+            value = json.loads(value)
+            if chunk and (len(chunk['value']) == 1 or chunk['beg_time'] + len(chunk['value']) * chunk['step_time'] == time):
+                if len(chunk['value']) == 1:
+                    chunk['step_time'] = time - chunk['beg_time']
+                chunk['value'].append(value)
+            else:
+                chunk = {'beg_time': time, 'step_time': 0, 'value': [value]}
+                chunks.append(chunk)
+        return {'body': chunks, 'status': 'ok'}
+
+    def getMeasure(self, netatmo_client: WeatherStationData, device_id, scale, mtype, module_id = None, date_begin = None, date_end = None, limit = None, optimize = False, real_time = False):
+        # Only optimized requests for a fixed time range can be answered from the store
+        if not optimize or date_begin == None or date_end == None or limit:
+            return netatmo_client.getMeasure(device_id, scale, mtype, module_id, date_begin, date_end, limit, optimize, real_time)
+
+        # real time values are aligned differently than the aggregated ones, they are kept apart
+        series = (device_id, module_id if module_id else '', scale, mtype, int(bool(real_time)))
+        covered_begin, covered_end, last_time = self.coveredRange(series)
+        stored = covered_begin != None and covered_begin <= date_end and covered_end >= date_begin
+        fetch_begin = date_begin
+        if covered_begin != None and covered_begin <= date_begin:
+            # the newest stored value may still change, e.g. the rain sum of the running hour
+            fetch_begin = max(date_begin, last_time if last_time != None else covered_end)
+
+        if fetch_begin < date_end:
+            try:
+                measure = netatmo_client.getMeasure(device_id, scale, mtype, module_id, fetch_begin, date_end, limit, optimize, real_time)
+            except Exception as e:
+                if not stored:
+                    raise
+                logging.warning('Fetching %s since %s failed, using stored values: %s', mtype, fetch_begin, e)
+                return self.load(series, date_begin, date_end)
+            if measure and 'body' in measure:
+                self.store(series, measure, fetch_begin, date_end)
+            elif not stored:
+                return measure
+            else:
+                logging.warning('Fetching %s since %s failed, using stored values', mtype, fetch_begin)
+        return self.load(series, date_begin, date_end)
@@ -9,8 +9,12 @@ from .ZStack import ZStack
 from .TextWidget import TextWidget, TextAlignVertical
 from .ImageWidget import ImageWidget
 from .ConfigHelper import ConfigHelper
-from PIL import Image, ImageDraw, ImageFont
-import os
+from .TextMetrics import TextMetrics
+from .RenderCache import RenderCache
+from .LayoutPlan import LayoutPlan
+from .MeasureSeries import MeasureSeries
+from .WindRose import WindRoseCache
+from PIL import Image, ImageDraw
 import math
 from datetime import datetime, timezone
 from lnetatmo import WeatherStationData
@@ -60,29 +64,38 @@ class ModuleWidget(View):
         self.unit_ratio = ratio
         return self
     
-    def prepareBody(self) -> View:
+    def unitWidget(self, unit_width: int) -> TextWidget:
+        return TextWidget(self.unit).setPadding(vertical = self.height * (1 - self.ratio) * 0.1, horizontal = 0).setTextAlignVertical(TextAlignVertical.BOTTOM).setWidth(unit_width)
+
+    def prepareBody(self, plan: tuple = None) -> View:
         body_value = TextWidget(self.body).setTextAlignVertical(TextAlignVertical.BOTTOM)
         body = HStack().addView(body_value).setWidth(self.width - 2 * self.padding_horizontal).setHeight(round((self.height - 2 * self.padding_vertical) * ( 1 - 2 * self.ratio)))
+        unit_width = round((self.width - 2 * self.padding_horizontal) * self.unit_ratio)
+
+        if plan:
+            # sizes fitted for the same values before
+            header_size, text_size, unit_size, padding = plan
+            body_value.setTextSize(text_size)
+            if self.unit:
+                body.addView(self.unitWidget(unit_width).setTextSize(unit_size))
+                body.setPadding(vertical = 0, horizontal = padding)
+            body.prepareChild()
+            return body
 
-        fontdir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'Font.ttc')
-        image = Image.new('RGBA', (self.width, self.height), (255, 255, 255, 0))
-        draw = ImageDraw.Draw(image)
         body.prepareChild()
         body_value.setTextSize(body_value.calculateTextSize(different_height = math.floor(body_value.height * 1.175)))
         body_value.setWidth(0)
         body_value.setHeight(0)
 
+        body_unit = None
         if self.unit:
             width = 0
             body.prepareChild()
             text_size = body_value.calculateTextSize(different_width = math.floor((self.width - 2 * self.padding_horizontal) * (1 - self.unit_ratio)), different_height = math.floor(body_value.height * 1.175))
             body_value.setTextSize(text_size)
-            font = ImageFont.truetype(fontdir, text_size)
-            l, t, r, b = draw.textbbox((0,0), self.body, font)
-            del font
-            unit_width = round((self.width - 2 * self.padding_horizontal) * self.unit_ratio)
+            l, t, r, b = TextMetrics().textBBox(self.body, text_size)
             width = r + unit_width
-            body_unit = TextWidget(self.unit).setPadding(vertical = self.height * (1 - self.ratio) * 0.1, horizontal = 0).setTextAlignVertical(TextAlignVertical.BOTTOM).setWidth(unit_width)
+            body_unit = self.unitWidget(unit_width)
             
             body.addView(body_unit)
             body.setPadding(vertical = 0, horizontal = round((self.width - 2 * self.padding_horizontal - width) / 2))
@@ -90,34 +103,92 @@ class ModuleWidget(View):
         body_value.setWidth(0)
         body_value.setHeight(0)
         body.prepareChild()
+        if body_unit:
+            body_unit.setTextSize(body_unit.calculateTextSize())
         return body
 
-    def render(self) -> Image:
+    def fingerprint(self) -> tuple:
+        body = self.body
+        if not type(self.body) is str:
+            body = self.body.fingerprint()
+            if body == None:
+                return None
+        return super().fingerprint() + (self.header, body, self.footer, self.ratio, self.unit, self.unit_ratio)
+
+    def prepareContent(self) -> Self:
+        # Hook to fill in header and body right before drawing
+        return self
+
+    def planKey(self) -> tuple:
+        body = self.body if type(self.body) is str else None
+        return ('module', self.width, self.height, self.padding_horizontal, self.padding_vertical, self.header, body, self.footer, self.ratio, self.unit, self.unit_ratio)
+
+    def prepareModule(self) -> tuple:
+        # Fitting the text sizes is done once per set of values, later refreshes take them from the plan
+        plan = LayoutPlan().get(self.planKey())
         header = TextWidget(self.header).setHeight(round((self.height - 2 * self.padding_vertical) * self.ratio))
         footer = TextWidget(self.footer).setHeight(round((self.height - 2 * self.padding_vertical) * self.ratio))
         if type(self.body) is str:
-            body = self.prepareBody()
+            body = self.prepareBody(plan)
         else:
             body = self.body.setWidth(self.width - 2 * self.padding_horizontal).setHeight(round((self.height - 2 * self.padding_vertical) * ( 1 - 2 * self.ratio)))
         module = VStack().setPadding(vertical = self.padding_vertical, horizontal = self.padding_horizontal)
         module.setHeight(self.height).setWidth(self.width).addView(header).addView(body).addView(footer).prepareChild()
 
-        sizes = []
-        sizes.append(header.calculateTextSize())
-        sizes.append(footer.calculateTextSize())
-        header.setTextSize(min(sizes))
-        footer.setTextSize(min(sizes))
+        if plan:
+            header_size = plan[0]
+        else:
+            sizes = []
+            sizes.append(header.calculateTextSize())
+            sizes.append(footer.calculateTextSize())
+            header_size = min(sizes)
+            plan = (header_size, None, None, None)
+            if type(self.body) is str:
+                body_value = body.view[0]
+                body_unit = body.view[1] if len(body.view) > 1 else None
+                plan = (header_size, body_value.text_size, body_unit.text_size if body_unit else None, body.padding_horizontal)
+            LayoutPlan().put(self.planKey(), plan)
+        header.setTextSize(header_size)
+        footer.setTextSize(header_size)
+        return module, header, footer
+
+    def drawLines(self, draw: ImageDraw, header: View, footer: View, x: int = 0, y: int = 0, fill = (0, 0, 0, 255)):
+        upper = y + header.height + self.padding_vertical
+        lower = y + self.height - footer.height - self.padding_vertical
+        # the line may end right of the widget, which only its own image clips
+        end = x + min(self.width - 2 * self.padding_horizontal, self.width - 1)
+        draw.line((x + self.padding_horizontal, upper, end, upper), fill = fill)
+        draw.line((x + self.padding_horizontal, lower, end, lower), fill = fill)
 
-        self.image = module.render()
-        draw = ImageDraw.Draw(self.image)
+    def render(self) -> Image:
+        self.prepareContent()
+        fingerprint = self.fingerprint()
+        cached = RenderCache().get(fingerprint)
+        if cached:
+            self.image = cached
+            return self.image
+        module, header, footer = self.prepareModule()
 
-        upper = header.height + self.padding_vertical
-        lower = self.height - footer.height - self.padding_vertical
-        draw.line((self.padding_horizontal, upper, self.width - 2 * self.padding_horizontal, upper), fill = (0, 0, 0, 255))
-        draw.line((self.padding_horizontal, lower, self.width - 2 * self.padding_horizontal, lower), fill = (0, 0, 0, 255))
+        # the stack's image may be shared through the render cache, so draw on a copy
+        self.image = module.render().copy()
+        self.drawLines(ImageDraw.Draw(self.image), header, footer)
 
         super().render()
-        return self.image
+        return RenderCache().put(fingerprint, self.image)
+
+    def renderInto(self, canvas: Image, x: int, y: int) -> Image:
+        self.prepareContent()
+        fingerprint = self.fingerprint()
+        if self.pasteCached(canvas, x, y, fingerprint):
+            return canvas
+        module, header, footer = self.prepareModule()
+
+        module.renderInto(canvas, x, y)
+        self.drawLines(ImageDraw.Draw(canvas), header, footer, x, y, fill = 0)
+
+        self.finishInto(canvas, x, y)
+        self.storeCached(canvas, x, y, fingerprint)
+        return canvas
     
 class MainModuleWidget(ModuleWidget):
     def __init__(self, module, ratio: float = 0.2):
@@ -166,24 +237,38 @@ class IndoorModuleWidget(ModuleWidget):
                 self.invert()
     
 class RainModuleWidget(ModuleWidget):
-    def __init__(self, module, main_module, netatmo_client: WeatherStationData, ratio: float = 0.2, unit: str = "mm", unit_ratio: float = 0.2):
+    def __init__(self, module, main_module, netatmo_client: WeatherStationData, ratio: float = 0.2, unit: str = "mm", unit_ratio: float = 0.2, now: float = None):
         config = ConfigHelper()
+        self.netatmo_client = netatmo_client
 
-        # Get hourly rain of last month
-        now = datetime.now(timezone.utc).timestamp()
+        # Hourly rain of last month, fetched with the other measures before rendering
+        now = now if now != None else datetime.now(timezone.utc).timestamp()
         last_month  = now - 36 * 24 * 3600
+        self.rain_request = dict(device_id = main_module["_id"], scale = '1hour', mtype = 'sum_rain', module_id = module["_id"], date_begin = last_month, date_end = now, optimize = True)
+
+        sum_rain = 0
+        if 'dashboard_data' in module:
+            sum_rain = module['dashboard_data']['sum_rain_24'] if 'sum_rain_24' in module['dashboard_data'] else 0
+        header = ""
+        body = config.format_decimal(sum_rain)
+        footer = module['module_name']
+        super().__init__(header, body, footer, ratio, unit, unit_ratio)
+        if module['battery_percent'] < config.highlight_battery_min:
+            self.setShowFrame(show_frame = True)
+
+    def collectMeasures(self, fetcher) -> Self:
+        fetcher.request(**self.rain_request)
+        return self
+
+    def prepareContent(self) -> Self:
         hours = 0
         time_unit = "?"
         try:
-            measure = netatmo_client.getMeasure(main_module["_id"], '1hour', 'sum_rain', module["_id"], date_begin = last_month, date_end = now, optimize = True)
+            measure = self.netatmo_client.getMeasure(**self.rain_request)
             hours = 0
 
-            rain_hour_values = []
-
             if measure and measure['body']:
-                for chunk in measure['body']:
-                    rain_hour_values.extend(chunk['value'])
-                rain_hour_values = [v[0] for v in rain_hour_values]
+                rain_hour_values = MeasureSeries.decode(measure).values()
                 logging.debug('Rain values: %s', rain_hour_values)
                 for x in reversed(rain_hour_values):
                     if x > 0:
@@ -196,63 +281,67 @@ class RainModuleWidget(ModuleWidget):
         except:
             logging.warning('Fetching rain data failed!')
 
-        sum_rain = 0
-        if 'dashboard_data' in module:
-            sum_rain = module['dashboard_data']['sum_rain_24'] if 'sum_rain_24' in module['dashboard_data'] else 0
-        header = "Regen vor " + str(hours) + time_unit
-        body = config.format_decimal(sum_rain)
-        footer = module['module_name']
-        super().__init__(header, body, footer, ratio, unit, unit_ratio)
-        if module['battery_percent'] < config.highlight_battery_min:
-            self.setShowFrame(show_frame = True)
+        self.setHeader("Regen vor " + str(hours) + time_unit)
+        return self
     
 class WindModuleWidget(ModuleWidget):
-    def __init__(self, module, main_module, netatmo_client: WeatherStationData, ratio: float = 0.2):
+    def __init__(self, module, main_module, netatmo_client: WeatherStationData, ratio: float = 0.2, now: float = None):
         config = ConfigHelper()
+        self.netatmo_client = netatmo_client
 
-        now = datetime.now(timezone.utc).timestamp()
-        last_day  = now - 24 * 3600
-        wind_angle_history = Image.new('RGBA', (100, 100), (255, 255, 255, 0))
-        draw_wind_angle = ImageDraw.Draw(wind_angle_history)
-        draw_wind_angle.ellipse((2, 2, 98, 98), (255, 255, 255, 1), (0, 0, 0), 4)
-        try:
-            measure = netatmo_client.getMeasure(main_module['_id'], '30min', 'windangle', module['_id'], date_begin = last_day, date_end = now, optimize = True)
-            angle_values = []
-            if measure and measure['body']:
-                for chunk in measure['body']:
-                    angle_values.extend(chunk['value'])
-                angle_values = [v[0] for v in angle_values]
-                logging.debug('Wind angle values: %s', angle_values)
-                for x in angle_values:
-                    draw_wind_angle.arc((10, 10, 90, 90), x - 95, x - 85, (0, 0, 0), 10)
-        except:
-            logging.warning('Fetching wind angle data failed!')
+        # Wind angles of the history, fetched with the other measures before rendering.
+        # A request returns up to 1024 values, longer histories use a coarser scale.
+        now = now if now != None else datetime.now(timezone.utc).timestamp()
+        history = config.wind_history_days * 24 * 3600
+        scale = '30min' if history <= 1024 * 1800 else '1hour' if history <= 1024 * 3600 else '3hours'
+        self.history_begin = now - history
+        self.wind_request = dict(device_id = main_module['_id'], scale = scale, mtype = 'windangle', module_id = module['_id'], date_begin = self.history_begin, date_end = now, optimize = True)
+        self.rose_key = (main_module['_id'], module['_id'], history)
 
-        current_angle = 0
-        current_strength = 1
+        self.current_angle = 0
+        self.current_strength = 1
         if 'dashboard_data' in module:
-            current_angle = 360 - module['dashboard_data']['WindAngle'] if 'WindAngle' in module['dashboard_data'] else 0
-            current_strength = module['dashboard_data']['WindStrength'] if 'WindStrength' in module['dashboard_data'] else 1
-        wind_gauge = Image.new('RGBA', (100, 100), (255, 255, 255, 0))
-        draw_wind_gauge = ImageDraw.Draw(wind_gauge)
-        polygon_points = [(30, 30), (50, 42), (70, 30), (50, 75), (30, 30)]
-        if current_strength >= config.highlight_calm_max:
-            draw_wind_gauge.polygon(polygon_points, (0, 0, 0))
-        else:
-            draw_wind_gauge.ellipse((40, 40, 60, 60), (0, 0, 0))
-        wind_gauge = wind_gauge.rotate(current_angle, resample=Image.Resampling.BICUBIC)
-
-        wind_angle_history.paste(wind_gauge, mask=wind_gauge)
+            self.current_angle = 360 - module['dashboard_data']['WindAngle'] if 'WindAngle' in module['dashboard_data'] else 0
+            self.current_strength = module['dashboard_data']['WindStrength'] if 'WindStrength' in module['dashboard_data'] else 1
 
         header = ""
         if 'dashboard_data' in module and 'WindStrength' in module['dashboard_data']:
             header = str(module['dashboard_data']['WindStrength']) + 'km/h (max: ' + str(module['dashboard_data']['max_wind_str'] if 'max_wind_str' in module['dashboard_data'] else 0) + ')'
-        body = ZStack().addView(ImageWidget(wind_angle_history)).setPadding(2, 2)
         footer = module['module_name']
-        super().__init__(header, body, footer, ratio)
+        super().__init__(header, "", footer, ratio)
         if module['battery_percent'] < config.highlight_battery_min:
             self.setShowFrame(show_frame = True)
         if 'dashboard_data' in module and 'WindStrength' in module['dashboard_data']:
             if module['dashboard_data']['WindStrength'] >= config.highlight_wind_max:
                 self.invert()
+
+    def collectMeasures(self, fetcher) -> Self:
+        fetcher.request(**self.wind_request)
+        return self
+
+    def prepareContent(self) -> Self:
+        config = ConfigHelper()
+        cache = WindRoseCache()
+        # the rose of the last refresh only takes the new angles
+        rose = cache.rose(self.rose_key, config.wind_rose_sectors)
+        try:
+            measure = self.netatmo_client.getMeasure(**self.wind_request)
+            if measure and measure['body']:
+                series = MeasureSeries.decode(measure)
+                logging.debug('Wind angle values: %s', series.values())
+                rose.update(series, self.history_begin)
+            else:
+                rose.expire(self.history_begin)
+        except:
+            logging.warning('Fetching wind angle data failed!')
+            rose.expire(self.history_begin)
+
+        calm = self.current_strength < config.highlight_calm_max
+        wind_angle_history = rose.render().copy()
+        wind_gauge = cache.arrow(self.current_angle, calm)
+        wind_angle_history.paste(wind_gauge, mask=wind_gauge)
+
+        image = ImageWidget(wind_angle_history).setKey(('wind', rose.key(), cache.arrowAngle(self.current_angle, calm), calm))
+        self.setBody(ZStack().addView(image).setPadding(2, 2))
+        return self
     
\ No newline at end of file
@@ -0,0 +1,184 @@
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self
+from .ConfigHelper import Singleton, ConfigHelper
+from lnetatmo import ClientAuth
+from urllib.parse import urlsplit, urlencode
+import http.client
+import json
+import lnetatmo
+import logging
+import os
+import ssl
+import threading
+import time
+
+class NetatmoTransport(metaclass=Singleton):
+    # Sends the requests of lnetatmo over kept alive connections, shared by all API calls.
+    # install() puts it in place of lnetatmo.postRequest, api_url can point to a local stub.
+    def __init__(self, api_url: str = None, max_connections: int = None):
+        config = ConfigHelper()
+        self.api_url = api_url if api_url else config.netatmo_api_url
+        if not self.api_url.endswith('/'):
+            self.api_url += '/'
+        self.max_connections = max_connections if max_connections != None else config.fetch_concurrency
+        self.context = ssl.create_default_context()
+        self.idle = {}
+        self.lock = threading.Lock()
+        self.original = None
+        self.requests = 0
+        self.connects = 0
+        # connections of the parent must not be used by forked processes
+        os.register_at_fork(after_in_child = self.forget)
+
+    def install(self) -> Self:
+        if not self.original:
+            self.original = lnetatmo.postRequest
+            lnetatmo.postRequest = self.postRequest
+        return self
+
+    def uninstall(self) -> Self:
+        if self.original:
+            lnetatmo.postRequest = self.original
+            self.original = None
+        return self
+
+    def forget(self):
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    def connect(self, scheme: str, host: str, port: int) -> http.client.HTTPConnection:
+        self.connects += 1
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, context = self.context)
+        return http.client.HTTPConnection(host, port)
+
+    def acquire(self, key: tuple) -> tuple:
+        # an idle connection if there is one, the flag tells whether it was used before
+        with self.lock:
+            idle = self.idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self.connect(*key), False
+
+    def release(self, key: tuple, connection: http.client.HTTPConnection):
+        with self.lock:
+            idle = self.idle.setdefault(key, [])
+            if len(idle) < self.max_connections:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        with self.lock:
+            connections = [connection for idle in self.idle.values() for connection in idle]
+            self.idle = {}
+        for connection in connections:
+            connection.close()
+
+    def url(self, url: str) -> str:
+        if url.startswith(lnetatmo._BASE_URL):
+            return self.api_url + url[len(lnetatmo._BASE_URL):]
+        return url
+
+    def send(self, method: str, url: str, body: bytes, headers: dict, timeout: float) -> tuple:
+        parts = urlsplit(self.url(url))
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        path = parts.path + ('?' + parts.query if parts.query else '')
+        while True:
+            connection, reused = self.acquire(key)
+            connection.timeout = timeout
+            if connection.sock:
+                connection.sock.settimeout(timeout)
+            try:
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                # the server closed the idle connection in the meantime, so it is tried on a new one
+                if reused:
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self.release(key, connection)
+            self.requests += 1
+            return response, data
+
+    def postRequest(self, topic, url, params = None, timeout = 10):
+        # Answers like lnetatmo.postRequest
+        headers = {}
+        body = None
+        if params:
+            params = dict(params)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded;charset=utf-8'
+            if 'access_token' in params:
+                headers['Authorization'] = 'Bearer %s' % params.pop('access_token')
+            body = urlencode(params).encode('utf-8')
+        response, data = self.send('POST' if body != None else 'GET', url, body, headers, timeout)
+        if response.status == 403:
+            logging.warning('Your current token scope do not allow access to %s', topic)
+            raise lnetatmo.OutOfScope('Your current token scope do not allow access to %s' % topic)
+        if response.status >= 400:
+            logging.error('code=%s, reason=%s, body=%s', response.status, response.reason, data)
+            return None
+        content_type = response.getheader('Content-Type') or ''
+        return json.loads(data.decode('utf-8')) if 'application/json' in content_type else data
+
+class CachedClientAuth(ClientAuth):
+    # Keeps the access token in a file, so a restart doesn't need a new one, and renews it
+    # a while before it expires instead of with the first request that fails
+    def __init__(self, path: str = None, refresh_margin: float = None, **kwargs):
+        super().__init__(**kwargs)
+        config = ConfigHelper()
+        self.path = os.path.expanduser(path if path != None else config.netatmo_token_cache)
+        self.refresh_margin = refresh_margin if refresh_margin != None else config.netatmo_token_refresh_margin_s
+        # the refresh token the credentials gave, the cache only applies while they still give it
+        self.credentials_refresh_token = self.refreshToken
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as file:
+                cache = json.load(file)
+        except (OSError, ValueError) as e:
+            logging.warning('Token cache %s could not be read: %s', self.path, e)
+            return
+        if cache.get('client_id') != self._clientId or cache.get('credentials_refresh_token') != self.credentials_refresh_token:
+            # new credentials were given since the cache was written
+            return
+        self._accessToken = cache['access_token']
+        self.expiration = cache['expiration']
+        # renewing may have replaced the refresh token the credentials gave
+        self.refreshToken = cache.get('refresh_token', self.refreshToken)
+
+    def save(self):
+        if not self.path:
+            return
+        if self._credentialFile:
+            # lnetatmo writes the renewed refresh token to the credential file
+            self.credentials_refresh_token = self.refreshToken
+        cache = {'client_id': self._clientId, 'credentials_refresh_token': self.credentials_refresh_token, 'access_token': self._accessToken, 'expiration': self.expiration, 'refresh_token': self.refreshToken}
+        try:
+            # only readable by the user, it grants access to the station
+            descriptor = os.open(self.path + '.tmp', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(descriptor, 'w') as file:
+                json.dump(cache, file)
+            os.replace(self.path + '.tmp', self.path)
+        except OSError as e:
+            logging.warning('Token cache %s could not be written: %s', self.path, e)
+
+    @property
+    def accessToken(self):
+        if self.expiration - self.refresh_margin < time.time():
+            self.renew_token()
+            self.save()
+        return self._accessToken
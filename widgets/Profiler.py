@@ -0,0 +1,153 @@
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self
+from .ConfigHelper import Singleton, ConfigHelper
+from .View import View
+from .TextWidget import TextWidget
+from .MeasureFetcher import MeasureFetcher
+from PIL import Image
+import logging
+import sys
+import threading
+import time
+
+class ProfileNode(object):
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.time = 0.0
+        self.net_blocks = 0
+        self.pixels = 0
+        self.children = {}
+
+    def child(self, name: str):
+        node = self.children.get(name)
+        if not node:
+            node = self.children.setdefault(name, ProfileNode(name))
+        return node
+
+    def add(self, node: Self) -> Self:
+        self.calls += node.calls
+        self.time += node.time
+        self.net_blocks += node.net_blocks
+        self.pixels += node.pixels
+        for child in node.children.values():
+            self.child(child.name).add(child)
+        return self
+
+    def ownTime(self) -> float:
+        return max(0.0, self.time - sum(child.time for child in self.children.values()))
+
+class Profiler(metaclass=Singleton):
+    # Methods wrapped when profiling, per class they are looked up in
+    methods = {View: ('collectMeasures', 'render', 'renderInto', 'prepareChild'), TextWidget: ('calculateTextSize',), MeasureFetcher: ('fetch', 'getMeasure', 'fetchMeasure')}
+
+    def __init__(self, enabled: bool = None, path: str = None):
+        config = ConfigHelper()
+        self.enabled = enabled if enabled != None else config.profile
+        self.path = path if path else config.profile_path
+        self.originals = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.reset()
+
+    def install(self) -> Self:
+        # Nothing is wrapped unless profiling is enabled, so it costs nothing otherwise
+        if not self.enabled or self.originals:
+            return self
+        for base, names in self.methods.items():
+            classes = [base]
+            for cls in classes:
+                classes.extend(cls.__subclasses__())
+            for cls in classes:
+                for name in names:
+                    if name in cls.__dict__:
+                        self.wrap(cls, name)
+        return self
+
+    def uninstall(self) -> Self:
+        for cls, name, original in reversed(self.originals):
+            setattr(cls, name, original)
+        self.originals = []
+        return self
+
+    def wrap(self, cls, name: str):
+        original = cls.__dict__[name]
+        profiler = self
+
+        def profiled(instance, *args, **kwargs):
+            parent, owner = getattr(profiler.local, 'current', (profiler.root, None))
+            if owner == (instance, name):
+                # super() calls of the same method are part of the caller's node
+                return original(instance, *args, **kwargs)
+            with profiler.lock:
+                node = parent.child(type(instance).__name__ + '.' + name)
+            profiler.local.current = (node, (instance, name))
+            blocks = sys.getallocatedblocks()
+            start = time.perf_counter()
+            try:
+                result = original(instance, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                # live blocks after the call minus before, negative if the call freed more than it kept
+                net_blocks = sys.getallocatedblocks() - blocks
+                with profiler.lock:
+                    node.time += elapsed
+                    node.net_blocks += net_blocks
+                    node.calls += 1
+                profiler.local.current = (parent, owner)
+            if isinstance(result, Image.Image):
+                # renderInto returns the whole canvas, the view only covers its own part of it
+                node.pixels += instance.width * instance.height if isinstance(instance, View) else result.width * result.height
+            return result
+
+        setattr(cls, name, profiled)
+        self.originals.append((cls, name, original))
+
+    def merge(self, root: ProfileNode) -> Self:
+        # Adds the nodes profiled in another process, e.g. a render worker, below the current node
+        parent = getattr(self.local, 'current', (self.root, None))[0]
+        with self.lock:
+            for child in root.children.values():
+                parent.child(child.name).add(child)
+        return self
+
+    def reset(self) -> Self:
+        self.root = ProfileNode('refresh')
+        self.start = time.perf_counter()
+        self.local = threading.local()
+        return self
+
+    def folded(self) -> list[str]:
+        # One line per call stack with its own time in microseconds, as flame graph tools read it
+        lines = []
+        def walk(node: ProfileNode, stack: str):
+            own = round(node.ownTime() * 1000000)
+            if own > 0:
+                lines.append('%s %s' % (stack, own))
+            for child in node.children.values():
+                walk(child, stack + ';' + child.name)
+        walk(self.root, self.root.name)
+        return lines
+
+    def report(self) -> list[str]:
+        lines = ['%-60s %6s %10s %10s %10s %10s' % ('node', 'calls', 'total ms', 'own ms', 'net blocks', 'pixels')]
+        def walk(node: ProfileNode, depth: int):
+            lines.append('%-60s %6s %10.2f %10.2f %10s %10s' % ('  ' * depth + node.name, node.calls, node.time * 1000, node.ownTime() * 1000, node.net_blocks, node.pixels))
+            for child in sorted(node.children.values(), key = lambda n: -n.time):
+                walk(child, depth + 1)
+        walk(self.root, 0)
+        return lines
+
+    def write(self) -> Self:
+        if not self.enabled:
+            return self
+        self.root.calls = 1
+        self.root.time = time.perf_counter() - self.start
+        with open(self.path + '.folded', 'w') as file:
+            file.write('\n'.join(self.folded()) + '\n')
+        with open(self.path + '.txt', 'w') as file:
+            file.write('\n'.join(self.report()) + '\n')
+        logging.debug('Refresh profile written to %s.txt and %s.folded', self.path, self.path)
+        return self
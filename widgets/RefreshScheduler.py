@@ -0,0 +1,99 @@
+from .ConfigHelper import ConfigHelper
+import logging
+import random
+import statistics
+import time
+
+class RefreshScheduler(object):
+    # Plans the wake ups of the main loop around the uploads of the stations.
+    # The clock and sleep functions can be replaced, e.g. to run on a virtual clock.
+    def __init__(self, refresh_interval: float = None, upload_period: float = 600, upload_delay: float = None, backoff_base: float = None, backoff_max: float = None, jitter: float = 0.1, history_size: int = 12, clock = time.time, sleep = time.sleep, random = random.random):
+        config = ConfigHelper()
+        self.refresh_interval = refresh_interval if refresh_interval != None else config.refresh_interval_s
+        self.default_period = upload_period
+        self.upload_delay = upload_delay if upload_delay != None else config.scheduler_upload_delay_s
+        self.backoff_base = backoff_base if backoff_base != None else config.scheduler_backoff_base_s
+        self.backoff_max = backoff_max if backoff_max != None else config.scheduler_backoff_max_s
+        self.jitter = jitter
+        self.history_size = history_size
+        self.clock = clock
+        self.sleep = sleep
+        self.random = random
+        self.uploads = {}
+        self.periods = {}
+        self.failures = 0
+        self.late_retry = {}
+
+    def uploadPeriod(self, station: str) -> float:
+        return self.periods.get(station, self.default_period)
+
+    def recordUpload(self, station: str, timestamp: float) -> bool:
+        uploads = self.uploads.setdefault(station, [])
+        if uploads and timestamp <= uploads[-1]:
+            return False
+        uploads.append(timestamp)
+        del uploads[:-self.history_size]
+
+        # Uploads in between are missed while sleeping, so each interval may span several periods
+        period = self.uploadPeriod(station)
+        estimates = []
+        for previous, current in zip(uploads, uploads[1:]):
+            interval = current - previous
+            estimates.append(interval / max(1, round(interval / period)))
+        if estimates:
+            self.periods[station] = statistics.median(estimates)
+        return True
+
+    def expectedUpload(self, station: str) -> float:
+        # The first upload expected once the refresh interval has passed
+        uploads = self.uploads.get(station)
+        if not uploads:
+            return None
+        period = self.uploadPeriod(station)
+        uploads_to_skip = max(1, -(-self.refresh_interval // period))
+        return uploads[-1] + uploads_to_skip * period
+
+    def nextRefresh(self, station: str) -> float:
+        expected = self.expectedUpload(station)
+        if expected == None:
+            return self.clock()
+        return expected + self.upload_delay
+
+    def isDue(self, station: str, upload_time: float) -> bool:
+        # An upload skipped on purpose is no reason to refresh while the expected one is only a bit late
+        expected = self.expectedUpload(station)
+        if expected == None:
+            return True
+        half_period = self.uploadPeriod(station) / 2
+        return upload_time >= expected - half_period or self.clock() >= expected + half_period
+
+    def withJitter(self, seconds: float) -> float:
+        return seconds * (1 + self.jitter * (2 * self.random() - 1))
+
+    def refreshed(self, station: str, upload_time: float) -> float:
+        # Seconds to sleep after the screen was refreshed with the data of upload_time
+        self.recordUpload(station, upload_time)
+        self.failures = 0
+        self.late_retry.pop(station, None)
+        seconds = max(self.upload_delay, self.nextRefresh(station) - self.clock())
+        logging.info('Upload period of %s is %.0fs, next refresh in %.0fs', station, self.uploadPeriod(station), seconds)
+        return seconds
+
+    def noNewData(self, station: str) -> float:
+        # The expected upload is late, ask again in growing steps up to half a period
+        retry = self.late_retry.get(station, self.upload_delay / 2)
+        retry = min(retry * 2, self.uploadPeriod(station) / 2)
+        self.late_retry[station] = retry
+        seconds = max(retry, self.nextRefresh(station) - self.clock())
+        logging.info('No new data of %s yet, asking again in %.0fs', station, seconds)
+        return seconds
+
+    def failed(self) -> float:
+        # Exponential backoff, the jitter keeps several displays from retrying in lockstep
+        seconds = self.withJitter(min(self.backoff_max, self.backoff_base * 2 ** self.failures))
+        self.failures += 1
+        logging.info('Attempt %s failed, retrying in %.0fs', self.failures, seconds)
+        return seconds
+
+    def wait(self, seconds: float):
+        self.sleep(max(0, seconds))
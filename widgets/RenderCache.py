@@ -0,0 +1,52 @@
+from .ConfigHelper import Singleton, ConfigHelper
+from PIL import Image
+from collections import OrderedDict
+
+class RenderCache(metaclass=Singleton):
+    # Kept images are limited by number and by the bytes of their pixels, an RGBA image takes
+    # 4 bytes per pixel, e.g. 1.9MB for a whole 880x528 screen
+    def __init__(self, max_size: int = None, max_bytes: int = None):
+        config = ConfigHelper()
+        self.max_size = max_size if max_size != None else config.render_cache_size
+        self.max_bytes = max_bytes if max_bytes != None else config.render_cache_bytes
+        self.images = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fingerprint: tuple) -> Image:
+        # Views without a fingerprint depend on more than their properties and are never cached
+        if fingerprint == None or self.max_size <= 0:
+            return None
+        image = self.images.get(fingerprint)
+        if image:
+            self.images.move_to_end(fingerprint)
+            self.hits += 1
+        else:
+            self.misses += 1
+        return image
+
+    @staticmethod
+    def imageBytes(image: Image) -> int:
+        return image.width * image.height * len(image.getbands())
+
+    def put(self, fingerprint: tuple, image: Image) -> Image:
+        size = self.imageBytes(image)
+        if fingerprint != None and self.max_size > 0 and (self.max_bytes <= 0 or size <= self.max_bytes):
+            previous = self.images.pop(fingerprint, None)
+            if previous:
+                self.bytes -= self.imageBytes(previous)
+            self.images[fingerprint] = image
+            self.bytes += size
+            while len(self.images) > self.max_size or (self.max_bytes > 0 and self.bytes > self.max_bytes):
+                self.bytes -= self.imageBytes(self.images.popitem(last = False)[1])
+        return image
+
+    def resetStatistics(self):
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.images.clear()
+        self.bytes = 0
+        self.resetStatistics()
@@ -5,27 +5,59 @@ except ImportError:
 from PIL import Image
 from .View import View
 from .ConfigHelper import ConfigHelper
-from datetime import datetime, timezone
+from .LayoutPlan import LayoutPlan
+from .ImageExporter import ImageExporter
 
 class Screen(View):
     def __init__(self, width: int = None, height: int = None):
         super().__init__()
         config = ConfigHelper()
         self.setSize(width = width if width else config.image_width, height = height if height else config.image_height)
-        self.image = Image.new('RGB', (self.width, self.height), (255, 255, 255))
         self.save_image = config.export_image
+        self.setRenderMode(config.render_mode)
     
     def setView(self, view: View) -> Self:
         self.view = view
+        self.laid_out = False
         return self
 
-    def render(self) -> Image:
+    def children(self) -> list:
+        return [self.view]
+
+    def prepareChild(self) -> Self:
         self.view.setSize(width = (self.width - 2 * self.padding_horizontal), height = (self.height - 2 * self.padding_vertical))
-        self.image.paste(self.view.render(), [self.padding_horizontal, self.padding_vertical])
-        
-        super().render()
+        return self
+
+    def layout(self) -> Self:
+        if not self.laid_out:
+            LayoutPlan().apply(self)
+        return self
+
+    def setRenderMode(self, mode: str) -> Self:
+        # 'RGBA' composites an image per view, 'L' lets the views draw into one grayscale canvas
+        self.render_mode = mode
+        if mode == 'L':
+            self.image = Image.new('L', (self.width, self.height), 255)
+        else:
+            self.image = Image.new('RGB', (self.width, self.height), (255, 255, 255))
+        return self
+
+    def collectMeasures(self, fetcher) -> Self:
+        self.layout()
+        self.view.collectMeasures(fetcher)
+        return self
+
+    def render(self) -> Image:
+        self.layout()
+        if self.render_mode == 'L':
+            self.image.paste(255, (0, 0, self.width, self.height))
+            self.renderChildInto(self.view, self.image, 0, 0, self.padding_horizontal, self.padding_vertical)
+            self.finishInto(self.image, 0, 0)
+        else:
+            self.image.paste(self.view.render(), [self.padding_horizontal, self.padding_vertical])
+            super().render()
 
         if self.save_image:
-            self.image.save(str(datetime.now(timezone.utc).timestamp()) + ".png")
+            ImageExporter().export(self.image)
 
         return self.image
\ No newline at end of file
@@ -3,10 +3,21 @@ try:
 except ImportError:
     from typing_extensions import Self
 from .View import View
+from .RenderCache import RenderCache
 from PIL import Image
 
 class Spacer(View):
     def render(self) -> Image:
+        fingerprint = self.fingerprint()
+        cached = RenderCache().get(fingerprint)
+        if cached:
+            self.image = cached
+            return self.image
         self.image = Image.new('RGBA', (self.width, self.height), (255, 255, 255, 0))
         super().render()
-        return self.image
\ No newline at end of file
+        return RenderCache().put(fingerprint, self.image)
+
+    def renderInto(self, canvas: Image, x: int, y: int) -> Image:
+        # the region is still blank, only frame and inversion are left to draw
+        self.finishInto(canvas, x, y)
+        return canvas
\ No newline at end of file
@@ -0,0 +1,29 @@
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self
+from lnetatmo import ClientAuth, WeatherStationData
+import lnetatmo
+
+class StationProbe(object):
+    # Asks Netatmo for the default station only, to see whether a new upload arrived
+    # before the payload of all stations is requested and parsed
+    def __init__(self, authorization: ClientAuth):
+        self.authorization = authorization
+        self.station = None
+        self.device_id = None
+
+    def remember(self, weatherData: WeatherStationData) -> Self:
+        self.station = weatherData.default_station
+        self.device_id = weatherData.stations[self.station]['_id']
+        return self
+
+    def isReady(self) -> bool:
+        return self.device_id != None
+
+    def lastStatusStore(self) -> int:
+        params = {"access_token": self.authorization.accessToken, "device_id": self.device_id, "get_favorites": "false"}
+        response = lnetatmo.postRequest("Weather station", lnetatmo._GETSTATIONDATA_REQ, params)
+        if not response or 'body' not in response or not response['body']['devices']:
+            raise lnetatmo.NoDevice("No weather station with id %s" % self.device_id)
+        return response['body']['devices'][0]['last_status_store']
@@ -0,0 +1,83 @@
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self
+from .ConfigHelper import Singleton, ConfigHelper
+from lnetatmo import WeatherStationData
+import logging
+
+class StationRegistry(metaclass=Singleton):
+    # Indexes stations and modules by id, by name and by what they measure. The index only holds
+    # positions in the payload and is built again when the stations or modules change, the values
+    # are always taken from the latest payload.
+    kinds = ('outdoor', 'indoor', 'wind', 'rain')
+
+    def __init__(self, secondary_stations: list[str] = None):
+        self.secondary_station_names = secondary_stations if secondary_stations != None else ConfigHelper().secondary_stations
+        self.weatherData = None
+        self.layout = None
+        self.builds = 0
+
+    def update(self, weatherData: WeatherStationData) -> Self:
+        self.weatherData = weatherData
+        layout = tuple((station['_id'], tuple(module['_id'] for module in station.get('modules', []))) for station in weatherData.rawData)
+        if layout != self.layout:
+            self.layout = layout
+            self.build()
+        return self
+
+    @staticmethod
+    def kind(data_type: list[str]) -> str:
+        if 'Temperature' in data_type and 'CO2' not in data_type:
+            return 'outdoor'
+        elif 'CO2' in data_type:
+            return 'indoor'
+        elif 'Wind' in data_type:
+            return 'wind'
+        elif 'Rain' in data_type:
+            return 'rain'
+        return None
+
+    def build(self):
+        self.builds += 1
+        self.station_positions = {}
+        self.module_positions = {}
+        self.by_kind = {}
+        self.by_data_type = {}
+        for i, station in enumerate(self.weatherData.rawData):
+            self.station_positions[station['_id']] = i
+            self.station_positions[station['station_name']] = i
+            kinds = self.by_kind[station['_id']] = {kind: [] for kind in self.kinds}
+            data_types = self.by_data_type[station['_id']] = {}
+            for j, module in enumerate(station.get('modules', [])):
+                self.module_positions[module['_id']] = (i, j)
+                kind = self.kind(module['data_type'])
+                if kind:
+                    kinds[kind].append(module['_id'])
+                for data_type in module['data_type']:
+                    data_types.setdefault(data_type, []).append(module['_id'])
+        for name in self.secondary_station_names:
+            if name not in self.station_positions:
+                logging.warning('Secondary station %s is not part of the station data', name)
+
+    def station(self, station: str = None) -> dict:
+        # By name or id, the default station if none is given
+        position = self.station_positions.get(station if station != None else self.weatherData.default_station)
+        return self.weatherData.rawData[position] if position != None else None
+
+    def module(self, module_id: str) -> dict:
+        position = self.module_positions.get(module_id)
+        if position == None:
+            return None
+        return self.weatherData.rawData[position[0]]['modules'][position[1]]
+
+    def modules(self, kind: str, station: str = None) -> list[dict]:
+        station = self.station(station)
+        return [self.module(module_id) for module_id in self.by_kind[station['_id']][kind]] if station else []
+
+    def modulesWith(self, data_type: str, station: str = None) -> list[dict]:
+        station = self.station(station)
+        return [self.module(module_id) for module_id in self.by_data_type[station['_id']].get(data_type, [])] if station else []
+
+    def secondaryStations(self) -> list[dict]:
+        return [self.station(name) for name in self.secondary_station_names if name in self.station_positions]
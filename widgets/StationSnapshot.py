@@ -0,0 +1,23 @@
+from .MeasureFetcher import MeasureFetcher
+from lnetatmo import WeatherStationData
+import logging
+import time
+
+class StationSnapshot(MeasureFetcher):
+    # The station data and the fetched measures of one refresh. It stands in for both the
+    # WeatherStationData and the fetcher, and can be pickled to render screens in other processes.
+    def __init__(self, weatherData: WeatherStationData, fetcher: MeasureFetcher, now: float = None):
+        super().__init__(None, max_workers = 1)
+        # screens rendered from the snapshot have to ask for the measures of the same time range
+        self.now = now if now != None else time.time()
+        self.rawData = weatherData.rawData
+        self.default_station = weatherData.default_station
+        self.stations = weatherData.stations
+        self.modules = weatherData.modules
+        self.results = dict(fetcher.results)
+        # exceptions of the http libraries don't always survive pickling
+        self.errors = {key: RuntimeError('%s: %s' % (type(e).__name__, e)) for key, e in fetcher.errors.items()}
+
+    def fetchMeasure(self, **request):
+        logging.warning('Measure %s is not part of the snapshot', request)
+        return None
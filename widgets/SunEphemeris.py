@@ -0,0 +1,72 @@
+from .ConfigHelper import Singleton, ConfigHelper
+from suntime import Sun, SunTimeException
+from datetime import date, datetime
+import json
+import logging
+import os
+import pytz
+
+class SunEphemeris(metaclass=Singleton):
+    # Sunrise and sunset of a whole year per location, computed once and kept in a file.
+    # A day is looked up by its index in the year, times are seconds since epoch, None where
+    # the sun doesn't rise or set.
+    def __init__(self, path: str = None):
+        self.path = path if path != None else ConfigHelper().sun_table
+        self.tables = {}
+        self.timezones = {}
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path) as file:
+                    self.tables = json.load(file)
+            except (OSError, ValueError) as e:
+                logging.warning('Sun table %s could not be read: %s', self.path, e)
+
+    def locationKey(self, latitude: float, longitude: float, year: int) -> str:
+        # about 100m, the times don't change on that distance
+        return '%.3f,%.3f,%d' % (latitude, longitude, year)
+
+    def computeYear(self, latitude: float, longitude: float, year: int) -> list:
+        sun = Sun(latitude, longitude)
+        table = []
+        for ordinal in range(date(year, 1, 1).toordinal(), date(year + 1, 1, 1).toordinal()):
+            day = datetime.fromordinal(ordinal)
+            try:
+                table.append([round(sun.get_sunrise_time(day).timestamp()), round(sun.get_sunset_time(day).timestamp())])
+            except SunTimeException:
+                table.append([None, None])
+        return table
+
+    def year(self, latitude: float, longitude: float, year: int) -> list:
+        key = self.locationKey(latitude, longitude, year)
+        table = self.tables.get(key)
+        if table == None:
+            table = self.tables[key] = self.computeYear(latitude, longitude, year)
+            self.save()
+        return table
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path + '.tmp', 'w') as file:
+                json.dump(self.tables, file, separators = (',', ':'))
+            os.replace(self.path + '.tmp', self.path)
+        except OSError as e:
+            logging.warning('Sun table %s could not be written: %s', self.path, e)
+
+    def sunTimes(self, latitude: float, longitude: float, day: date) -> tuple:
+        # Sunrise and sunset of the day
+        return tuple(self.year(latitude, longitude, day.year)[day.timetuple().tm_yday - 1])
+
+    def timezone(self, name: str):
+        zone = self.timezones.get(name)
+        if zone == None:
+            zone = self.timezones[name] = pytz.timezone(name)
+        return zone
+
+    def localTime(self, timestamp: float, timezone: str) -> datetime:
+        return datetime.fromtimestamp(timestamp, self.timezone(timezone))
+
+    def clear(self):
+        self.tables.clear()
+        self.timezones.clear()
@@ -0,0 +1,49 @@
+from .ConfigHelper import Singleton
+from .FontCache import FontCache
+from collections import OrderedDict
+
+class TextMetrics(metaclass=Singleton):
+    def __init__(self, max_size: int = 2048):
+        self.max_size = max_size
+        self.metrics = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def entry(self, text: str, size: int, path: str = None) -> list:
+        # One entry per (font, size, text) holding the lazily measured length and bbox
+        key = (path if path else FontCache.default_font, size, text)
+        entry = self.metrics.get(key)
+        if entry:
+            self.metrics.move_to_end(key)
+            return entry
+        entry = [None, None]
+        self.metrics[key] = entry
+        if len(self.metrics) > self.max_size:
+            self.metrics.popitem(last = False)
+        return entry
+
+    def textLength(self, text: str, size: int, path: str = None) -> float:
+        entry = self.entry(text, size, path)
+        if entry[0] == None:
+            self.misses += 1
+            entry[0] = FontCache().getFont(size, path).getlength(text)
+        else:
+            self.hits += 1
+        return entry[0]
+
+    def textBBox(self, text: str, size: int, path: str = None) -> tuple:
+        entry = self.entry(text, size, path)
+        if entry[1] == None:
+            self.misses += 1
+            entry[1] = FontCache().getFont(size, path).getbbox(text)
+        else:
+            self.hits += 1
+        return entry[1]
+
+    def resetStatistics(self):
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.metrics.clear()
+        self.resetStatistics()
@@ -3,9 +3,13 @@ try:
 except ImportError:
     from typing_extensions import Self
 from .View import View
-from PIL import Image, ImageDraw, ImageFont
+from .FontCache import FontCache
+from .TextMetrics import TextMetrics
+from .RenderCache import RenderCache
+from .GlyphAtlas import GlyphAtlas
+from .ConfigHelper import ConfigHelper
+from PIL import Image, ImageDraw
 import enum
-import os
 
 class TextAlignHorizontal(enum.Enum):
     LEFT = 1
@@ -17,6 +21,8 @@ class TextAlignVertical(enum.Enum):
     CENTER = 2
     BOTTOM = 3
     
+TEXT_THRESHOLD = [0] * 255 + [255]
+
 class TextWidget(View):
     def __init__(self, text: str, text_align_horizontal: TextAlignHorizontal = TextAlignHorizontal.CENTER, text_align_vertical: TextAlignVertical = TextAlignVertical.CENTER, text_size: int = None, max_text_size: int = None):
         super().__init__()
@@ -52,6 +58,23 @@ class TextWidget(View):
         self.max_text_size = size
         return self
     
+    def findLargestSize(self, fits) -> int:
+        # text extents grow with the font size, so a galloping search followed by
+        # a binary search finds the same size as counting up from 5 one by one
+        low = 4
+        high = 5
+        while high <= 10000 and fits(high):
+            low = high
+            high = high * 2
+        high = min(high, 10001)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if fits(middle):
+                low = middle
+            else:
+                high = middle
+        return low
+
     def calculateTextSize(self, different_width: int = None, different_height: int = None) -> int:
         box_width = self.width
         box_height = self.height
@@ -59,64 +82,43 @@ class TextWidget(View):
             box_width = different_width
         if different_height:
             box_height = different_height
-        image = Image.new('RGBA', (box_width, box_height), (255, 255, 255, 0))
-        fontdir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'Font.ttc')
-        draw = ImageDraw.Draw(image)
+        metrics = TextMetrics()
 
         # find right text size horizontal
         sizes = []
         if self.max_text_size != None:
             sizes.append(self.max_text_size)
 
+        available_width = box_width - 2 * self.padding_horizontal
         for line in self.text:
-            size = 5
-            while True:
-                if line == "":
-                    size = 10000
-                    break
-                font = ImageFont.truetype(fontdir, size)
-                length = draw.textlength(line, font)
-                del font
-                if length > (box_width - 2 * self.padding_horizontal):
-                    break
-                size += 1
-                if size > 10000:
-                    break
-            sizes.append(size - 1)
+            if line == "":
+                sizes.append(9999)
+                continue
+            sizes.append(self.findLargestSize(lambda size: metrics.textLength(line, size) <= available_width))
 
         # find right text size vertical
-        size = 5
-        while True:
-            font = ImageFont.truetype(fontdir, size)
+        available_height = box_height - 2 * self.padding_vertical
+        def fitsHeight(size: int) -> bool:
             height = 0
             for line in self.text:
-                l, t, r, b = draw.textbbox((0,0), line, font)
+                l, t, r, b = metrics.textBBox(line, size)
                 height += b
-            del font
-            if height > (box_height - 2 * self.padding_vertical):
-                break
-            size += 1
-            if size > 10000:
-                break
-        sizes.append(size - 1)
+            return height <= available_height
+        sizes.append(self.findLargestSize(fitsHeight))
 
         return min(sizes)
 
-    def render(self) -> Image:
-        self.image = Image.new('RGBA', (self.width, self.height), (255, 255, 255, 0))
-        fontdir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'Font.ttc')
-        draw = ImageDraw.Draw(self.image)
-
-        if self.text_size == None:
-            self.text_size = self.calculateTextSize()
+    def fingerprint(self) -> tuple:
+        return super().fingerprint() + (tuple(self.text), self.text_align_horizontal, self.text_align_vertical, self.text_size, self.max_text_size)
 
-        # set font
-        font = ImageFont.truetype(fontdir, self.text_size)
+    def linePositions(self) -> list[tuple]:
+        # Where render() draws each line, relative to the widget
+        metrics = TextMetrics()
 
         # get vertical position
         height = 0
         for line in self.text:
-            l, t, r, b = draw.textbbox((0,0), line, font)
+            l, t, r, b = metrics.textBBox(line, self.text_size)
             height += b
         top = 0
         if self.text_align_vertical == TextAlignVertical.TOP:
@@ -126,9 +128,10 @@ class TextWidget(View):
         elif self.text_align_vertical == TextAlignVertical.BOTTOM:
             top = self.padding_vertical + (self.height - 2 * self.padding_vertical - height)
 
-        # get horizontal position and draw
+        # get horizontal position
+        positions = []
         for line in self.text:
-            l, t, r, b = draw.textbbox((0, 0), line, font)
+            l, t, r, b = metrics.textBBox(line, self.text_size)
             left = 0
             if self.text_align_horizontal == TextAlignHorizontal.LEFT:
                 left = self.padding_horizontal
@@ -136,9 +139,59 @@ class TextWidget(View):
                 left = self.padding_horizontal + ((self.width - 2 * self.padding_horizontal - r) / 2)
             elif self.text_align_horizontal == TextAlignHorizontal.RIGHT:
                 left = self.padding_horizontal + (self.width - 2 * self.padding_horizontal - r)
-            draw.text((left, top), line, font = font, fill = (0, 0, 0, 255))
+            positions.append((left, top, line))
             top += b
+        return positions
+
+    def drawLine(self, draw: ImageDraw, xy: tuple, line: str, fill):
+        # Readings are put together from cached glyphs, which gives the same pixels as FreeType
+        atlas = GlyphAtlas()
+        if ConfigHelper().glyph_atlas and atlas.supports(line, self.text_size):
+            atlas.drawText(draw, xy, line, self.text_size, fill)
+        else:
+            draw.text(xy, line, font = FontCache().getFont(self.text_size), fill = fill)
+
+    def render(self) -> Image:
+        fingerprint = self.fingerprint()
+        cached = RenderCache().get(fingerprint)
+        if cached:
+            self.image = cached
+            return self.image
+        self.image = Image.new('RGBA', (self.width, self.height), (255, 255, 255, 0))
+        draw = ImageDraw.Draw(self.image)
+
+        if self.text_size == None:
+            self.text_size = self.calculateTextSize()
+
+        for left, top, line in self.linePositions():
+            self.drawLine(draw, (left, top), line, (0, 0, 0, 255))
 
-        del font
         super().render()
-        return self.image
\ No newline at end of file
+        return RenderCache().put(fingerprint, self.image)
+
+    def renderInto(self, canvas: Image, x: int, y: int) -> Image:
+        fingerprint = self.fingerprint()
+        if self.pasteCached(canvas, x, y, fingerprint):
+            return canvas
+        if self.text_size == None:
+            self.text_size = self.calculateTextSize()
+
+        # text reaching out of the widget has to be clipped, which takes an image of its own
+        metrics = TextMetrics()
+        positions = self.linePositions()
+        for left, top, line in positions:
+            l, t, r, b = metrics.textBBox(line, self.text_size)
+            if left + l < 1 or top + t < 1 or left + r > self.width - 1 or top + b > self.height - 1:
+                return super().renderInto(canvas, x, y)
+
+        draw = ImageDraw.Draw(canvas)
+        for left, top, line in positions:
+            self.drawLine(draw, (x + left, y + top), line, 0)
+
+        # the composited RGBA text drops its alpha, so every pixel a glyph touches ends up black
+        box = (x, y, x + self.width, y + self.height)
+        canvas.paste(canvas.crop(box).point(TEXT_THRESHOLD), box)
+
+        self.finishInto(canvas, x, y)
+        self.storeCached(canvas, x, y, fingerprint)
+        return canvas
\ No newline at end of file
@@ -4,6 +4,7 @@ except ImportError:
     from typing_extensions import Self
 from PIL import Image
 from .View import View
+from .RenderCache import RenderCache
 
 class VStack(View):
     def __init__(self): 
@@ -19,7 +20,15 @@ class VStack(View):
         self.gap = gap
         return self
     
+    def children(self) -> list:
+        return self.view
+
+    def layoutKey(self) -> tuple:
+        return super().layoutKey() + (self.gap,)
+
     def prepareChild(self) -> Self:
+        if self.laid_out:
+            return self
         defined_height = 0
         undefined_weight = 0
         for view in self.view:
@@ -40,9 +49,26 @@ class VStack(View):
                 view.setWidth(width = (self.width - 2 * self.padding_horizontal))
         
         return self
-    
+
+    def collectMeasures(self, fetcher) -> Self:
+        self.prepareChild()
+        for view in self.view:
+            view.collectMeasures(fetcher)
+        return self
+
+    def fingerprint(self) -> tuple:
+        children = tuple(view.fingerprint() for view in self.view)
+        if None in children:
+            return None
+        return super().fingerprint() + (self.gap, children)
+
     def render(self) -> Image:
         self.prepareChild()
+        fingerprint = self.fingerprint()
+        cached = RenderCache().get(fingerprint)
+        if cached:
+            self.image = cached
+            return self.image
 
         self.image = Image.new('RGBA', (self.width, self.height), (255, 255, 255, 0))
 
@@ -54,5 +80,21 @@ class VStack(View):
             y = y + view.height + self.gap
         
         super().render()
-        return self.image
+        return RenderCache().put(fingerprint, self.image)
+
+    def renderInto(self, canvas: Image, x: int, y: int) -> Image:
+        self.prepareChild()
+        fingerprint = self.fingerprint()
+        if self.pasteCached(canvas, x, y, fingerprint):
+            return canvas
+
+        child_x = self.padding_horizontal
+        child_y = self.padding_vertical
+
+        for view in self.view:
+            self.renderChildInto(view, canvas, x, y, child_x, child_y)
+            child_y = child_y + view.height + self.gap
 
+        self.finishInto(canvas, x, y)
+        self.storeCached(canvas, x, y, fingerprint)
+        return canvas
@@ -3,6 +3,7 @@ try:
 except ImportError:
     from typing_extensions import Self
 from PIL import Image, ImageOps, ImageDraw
+from .RenderCache import RenderCache
 
 class View(object):
     def __init__(self):
@@ -13,6 +14,7 @@ class View(object):
         self.inverted = False
         self.layoutWeight = 1
         self.show_frame = False
+        self.laid_out = False
 
     def render(self) -> Image:
         if self.show_frame:
@@ -20,7 +22,70 @@ class View(object):
             draw.rectangle([(self.padding_horizontal, self.padding_vertical), (self.width - self.padding_horizontal - 1, self.height - self.padding_vertical - 1)], outline = "black", width = 1)
         if self.inverted:
             self.image = ImageOps.invert(self.image.convert('RGB')).convert('RGBA')
+
+    def renderInto(self, canvas: Image, x: int, y: int) -> Image:
+        # Draw onto a shared canvas at an absolute position, views that can't draw there
+        # directly are rendered on their own image and copied over like a stack would paste them
+        canvas.paste(self.render().convert(canvas.mode), (x, y))
+        return canvas
+
+    def renderChildInto(self, view: Self, canvas: Image, x: int, y: int, child_x: int, child_y: int) -> Image:
+        # A child reaching out of this view is clipped, as pasting into this view's image would
+        if child_x >= 0 and child_y >= 0 and child_x + view.width <= self.width and child_y + view.height <= self.height:
+            return view.renderInto(canvas, x + child_x, y + child_y)
+        left = max(0, -child_x)
+        top = max(0, -child_y)
+        right = min(view.width, self.width - child_x)
+        bottom = min(view.height, self.height - child_y)
+        image = view.render()
+        if right > left and bottom > top:
+            canvas.paste(image.crop((left, top, right, bottom)).convert(canvas.mode), (x + child_x + left, y + child_y + top))
+        return canvas
+
+    def finishInto(self, canvas: Image, x: int, y: int):
+        # What render() does with the own image, applied to the view's region of the canvas
+        if self.show_frame:
+            draw = ImageDraw.Draw(canvas)
+            draw.rectangle([(x + self.padding_horizontal, y + self.padding_vertical), (x + self.width - self.padding_horizontal - 1, y + self.height - self.padding_vertical - 1)], outline = 0, width = 1)
+        if self.inverted:
+            box = (x, y, x + self.width, y + self.height)
+            canvas.paste(ImageOps.invert(canvas.crop(box)), box)
+
+    def canvasKey(self, canvas: Image, fingerprint: tuple) -> tuple:
+        if fingerprint == None:
+            return None
+        return fingerprint + (canvas.mode,)
+
+    def pasteCached(self, canvas: Image, x: int, y: int, fingerprint: tuple) -> bool:
+        cached = RenderCache().get(self.canvasKey(canvas, fingerprint))
+        if cached:
+            canvas.paste(cached, (x, y))
+            return True
+        return False
+
+    def storeCached(self, canvas: Image, x: int, y: int, fingerprint: tuple):
+        key = self.canvasKey(canvas, fingerprint)
+        if key:
+            RenderCache().put(key, canvas.crop((x, y, x + self.width, y + self.height)))
+
+    def children(self) -> list:
+        return []
+
+    def layoutKey(self) -> tuple:
+        # The properties the layout of the tree depends on, read before sizes are distributed
+        return (type(self).__name__, self.width, self.height, self.padding_horizontal, self.padding_vertical, self.layoutWeight)
+
+    def prepareChild(self) -> Self:
+        return self
+
+    def fingerprint(self) -> tuple:
+        # Everything the rendered image depends on, None if it can't be described by properties
+        return (type(self).__name__, self.width, self.height, self.padding_horizontal, self.padding_vertical, self.inverted, self.show_frame)
     
+    def collectMeasures(self, fetcher) -> Self:
+        # Register the getMeasure calls needed to render, sizes are known at this point
+        return self
+
     def setSize(self, width: int, height: int) -> Self:
         self.setWidth(width = width).setHeight(height = height)
         return self
@@ -0,0 +1,119 @@
+from .ConfigHelper import Singleton
+from .MeasureSeries import MeasureSeries
+from PIL import Image, ImageDraw
+from collections import deque
+import bisect
+import math
+
+class WindRose(object):
+    # Wind angles of a time window counted per sector. Samples are added and expired as the window
+    # moves along, only the sectors that became occupied or empty are drawn again.
+    size = 100
+    background = (255, 255, 255, 1)
+
+    def __init__(self, sectors: int = 36):
+        self.sectors = sectors
+        self.sector_width = 360 / sectors
+        # an erased sector may have taken a pixel of the ones next to it
+        self.reach = max(1, math.ceil(2 / self.sector_width))
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * self.sectors
+        self.samples = deque()
+        self.last = float('-inf')
+        self.changed = set()
+        self.image = None
+
+    def sector(self, angle: float) -> int:
+        return math.floor(angle / self.sector_width + 0.5) % self.sectors
+
+    def add(self, timestamp: float, angle: float):
+        sector = self.sector(angle)
+        self.samples.append((timestamp, sector))
+        self.counts[sector] += 1
+        if self.counts[sector] == 1:
+            self.changed.add(sector)
+        self.last = timestamp
+
+    def expire(self, begin: float):
+        while self.samples and self.samples[0][0] < begin:
+            timestamp, sector = self.samples.popleft()
+            self.counts[sector] -= 1
+            if self.counts[sector] == 0:
+                self.changed.add(sector)
+
+    def update(self, series: MeasureSeries, begin: float):
+        # The series is sorted by time, only what came after the last sample added is new
+        timestamps = series.timestamps
+        if len(timestamps) and timestamps[-1] < self.last:
+            # the clock went back, e.g. a replay started over
+            self.reset()
+        values = series.values()
+        for i in range(bisect.bisect_right(timestamps, self.last), len(timestamps)):
+            if not math.isnan(values[i]):
+                self.add(timestamps[i], values[i])
+        self.expire(begin)
+
+    def key(self) -> bytes:
+        # the occupied sectors, all the image depends on
+        return bytes(count > 0 for count in self.counts)
+
+    def drawSector(self, draw: ImageDraw, sector: int, fill):
+        center = sector * self.sector_width - 90
+        draw.arc((10, 10, 90, 90), center - self.sector_width / 2, center + self.sector_width / 2, fill, 10)
+
+    def render(self) -> Image:
+        # The image is kept for the next refresh, callers must not draw on it
+        if self.image == None:
+            self.image = Image.new('RGBA', (self.size, self.size), (255, 255, 255, 0))
+            ImageDraw.Draw(self.image).ellipse((2, 2, 98, 98), self.background, (0, 0, 0), 4)
+            self.changed = set(range(self.sectors))
+        draw = ImageDraw.Draw(self.image)
+        redraw = set()
+        for sector in self.changed:
+            if self.counts[sector]:
+                redraw.add(sector)
+            else:
+                self.drawSector(draw, sector, self.background)
+                redraw.update((sector + i) % self.sectors for i in range(-self.reach, self.reach + 1))
+        for sector in redraw:
+            if self.counts[sector]:
+                self.drawSector(draw, sector, (0, 0, 0))
+        self.changed = set()
+        return self.image
+
+class WindRoseCache(metaclass=Singleton):
+    # Keeps the roses between refreshes and the arrow rotated to every step of the current angle
+    arrow_step = 5
+
+    def __init__(self):
+        self.roses = {}
+        self.arrows = {}
+
+    def rose(self, key: tuple, sectors: int) -> WindRose:
+        rose = self.roses.get(key)
+        if rose == None or rose.sectors != sectors:
+            rose = self.roses[key] = WindRose(sectors)
+        return rose
+
+    def arrowAngle(self, angle: float, calm: bool) -> int:
+        return 0 if calm else round(angle / self.arrow_step) * self.arrow_step % 360
+
+    def arrow(self, angle: float, calm: bool) -> Image:
+        key = (self.arrowAngle(angle, calm), calm)
+        arrow = self.arrows.get(key)
+        if arrow == None:
+            arrow = Image.new('RGBA', (WindRose.size, WindRose.size), (255, 255, 255, 0))
+            draw = ImageDraw.Draw(arrow)
+            if calm:
+                draw.ellipse((40, 40, 60, 60), (0, 0, 0))
+            else:
+                draw.polygon([(30, 30), (50, 42), (70, 30), (50, 75), (30, 30)], (0, 0, 0))
+                arrow = arrow.rotate(key[0], resample = Image.Resampling.BICUBIC)
+            self.arrows[key] = arrow
+        return arrow
+
+    def clear(self):
+        self.roses.clear()
+        self.arrows.clear()
@@ -4,6 +4,7 @@ except ImportError:
     from typing_extensions import Self
 from PIL import Image
 from .View import View
+from .RenderCache import RenderCache
 
 class ZStack(View):
     def __init__(self):
@@ -14,7 +15,12 @@ class ZStack(View):
         self.view.append(view)
         return self
     
+    def children(self) -> list:
+        return self.view
+
     def prepareChild(self) -> Self:
+        if self.laid_out:
+            return self
         for view in self.view:
             if (view.width == 0):
                 view.setWidth(width = (self.width - 2 * self.padding_horizontal))
@@ -22,9 +28,26 @@ class ZStack(View):
                 view.setHeight(height = (self.height - 2 * self.padding_vertical))
 
         return self
-    
+
+    def collectMeasures(self, fetcher) -> Self:
+        self.prepareChild()
+        for view in self.view:
+            view.collectMeasures(fetcher)
+        return self
+
+    def fingerprint(self) -> tuple:
+        children = tuple(view.fingerprint() for view in self.view)
+        if None in children:
+            return None
+        return super().fingerprint() + (children,)
+
     def render(self) -> Image:
         self.prepareChild()
+        fingerprint = self.fingerprint()
+        cached = RenderCache().get(fingerprint)
+        if cached:
+            self.image = cached
+            return self.image
         
         self.image = Image.new('RGBA', (self.width, self.height), (255, 255, 255, 0))
         
@@ -36,5 +59,5 @@ class ZStack(View):
             self.image.paste(img, [x, y], img)
         
         super().render()
-        return self.image
+        return RenderCache().put(fingerprint, self.image)
 
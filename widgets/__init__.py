@@ -7,4 +7,24 @@ from .Spacer import Spacer
 from .TextWidget import TextWidget, TextAlignHorizontal, TextAlignVertical
 from .ModuleWidget import ModuleWidget, MainModuleWidget, OutdoorModuleWidget, IndoorModuleWidget, RainModuleWidget, WindModuleWidget
 from .ImageWidget import ImageWidget
-from .GraphWidget import GraphWidget
\ No newline at end of file
+from .GraphWidget import GraphWidget
+from .TextMetrics import TextMetrics
+from .RenderCache import RenderCache
+from .DisplayUpdater import DisplayUpdater, FakeEPD
+from .MeasureFetcher import MeasureFetcher
+from .MeasureStore import MeasureStore
+from .Profiler import Profiler
+from .RefreshScheduler import RefreshScheduler
+from .StationProbe import StationProbe
+from .LayoutPlan import LayoutPlan
+from .GlyphAtlas import GlyphAtlas
+from .MeasureSeries import MeasureSeries
+from .StationSnapshot import StationSnapshot
+from .ImageExporter import ImageExporter
+from .FrameServer import FrameServer
+from .WindRose import WindRose, WindRoseCache
+from .SunEphemeris import SunEphemeris
+from .StationRegistry import StationRegistry
+from .NetatmoTransport import NetatmoTransport, CachedClientAuth
+from .MeasurePlanner import MeasurePlanner
+from .ImageEncoder import ImageEncoder
\ No newline at end of file